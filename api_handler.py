@@ -1,122 +1,216 @@
-import requests
-import pandas as pd
-import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from config import ConfigManager
+from database import DatabaseManager
+from leaderboard import Leaderboard
+from metrics import metrics
 from modes import ModeManager
+from page_fetcher import PageFetcher, parse_rank_range, get_window_pages
+from query_executor import CancelToken
+from regions import DEFAULT_REGION, get_regions, prefetch, merge_by_score
+from response_cache import get_response_cache
+
+# 跨服务器合并时每个服务器最多提前缓冲的行数
+PREFETCH_ROWS = 200
 
 class APIHandler:
-    def __init__(self):
-        # 使用国服地下竞技场API地址
-        self.api_base_url = "https://webapi.blizzard.cn/hs-rank-api-server/api/game/ranks"
+    def __init__(self, db_manager=None):
         self.config_manager = ConfigManager()
+        # 使用国服地下竞技场API地址（可在配置中修改）
+        self.api_base_url = self.config_manager.get_api_base_url()
         self.mode_manager = ModeManager()
+        self.db_manager = db_manager or DatabaseManager()
+        # 各服务器的API约定，分页获取器按服务器创建并复用
+        self.regions = get_regions(self.config_manager)
+        self.page_fetchers = {}
+        self.page_fetchers_lock = threading.Lock()
+        self.page_fetcher = self.get_page_fetcher(DEFAULT_REGION)
     
-    def get_rank_data(self, mode, server, player_class, rank_range, season):
+    def get_page_fetcher(self, server):
         """
-        获取排行榜数据
+        获取服务器对应的分页获取器，未知服务器使用国服，未启用的服务器抛出ValueError
         """
-        current_season = self.config_manager.get_current_season()
-        history_seasons = self.config_manager.get_history_seasons()
+        region = self.regions.get(server) or self.regions[DEFAULT_REGION]
+        if not region.enabled:
+            raise ValueError(f'{server} 未启用，请在config.json的regions中配置排行榜ID和赛季号后启用')
         
-        # 检查是否为历史赛季
-        if int(season) in history_seasons:
-            return self.get_data_from_database(mode, server, season)
+        with self.page_fetchers_lock:
+            page_fetcher = self.page_fetchers.get(region.name)
+            if page_fetcher is None:
+                page_fetcher = PageFetcher(region.base_url, self.config_manager.get_max_concurrent_requests(),
+                                           cache=get_response_cache(), region=region)
+                self.page_fetchers[region.name] = page_fetcher
         
+        return page_fetcher
+    
+    def get_rank_data(self, mode, server, player_class, rank_range, season):
+        """
+        获取排行榜数据
+        """
         try:
-            # 解析排名范围
-            start, end = map(int, rank_range.split('-'))
-            
-            # 计算需要的页数
-            page_size = 25
-            pages = (end - start + 1 + page_size - 1) // page_size
-            
-            # 获取模式处理器
-            mode_handler = self.mode_manager.get_mode_handler(mode)
-            
-            # 获取模式对应的API参数
-            api_params = mode_handler.get_api_params(current_season)
-            mode_name = api_params.get('mode_name', 'undergroundarena')
-            
             # 存储所有数据
-            all_data = []
+            all_data = Leaderboard()
             
-            # 分页获取数据
-            for page in range(1, pages + 1):
-                # 构建API请求参数
-                params = {
-                    'page': page,
-                    'page_size': page_size,
-                    'mode_name': mode_name,
-                    'season_id': current_season  # 使用配置中的当前赛季
-                }
-                
-                # 发送API请求
-                response = requests.get(self.api_base_url, params=params)
-                response.raise_for_status()  # 检查请求是否成功
-                
-                # 解析响应数据
-                data = response.json()
-                
-                # 使用模式处理器解析数据
-                parsed_data = mode_handler.parse_api_data(data)
-                
-                # 过滤排名范围内的数据
-                for item in parsed_data:
-                    if item and len(item) > 0:
-                        rank = item[0]
-                        if start <= rank <= end:
-                            all_data.append(item)
+            for completed, total, rows in self.iter_rank_data(mode, server, player_class, rank_range, season):
+                all_data.extend(rows)
             
             # 按排名排序
-            all_data.sort(key=lambda x: x[0])
+            with metrics.timer('query.sort'):
+                all_data.sort(by='rank')
             
             return all_data
             
         except Exception as e:
             print(f"API调用失败: {e}")
             # API调用失败时返回空数据
-            return []
+            return Leaderboard()
     
-    def get_data_from_database(self, mode, server, season):
+    def get_multi_mode_data(self, modes, server, player_class, rank_range, season):
         """
-        从数据库获取历史赛季数据
+        同时获取多个模式的排行榜，返回 {模式: Leaderboard}
+        各模式的分页请求共用同一个HTTP客户端，总并发仍受限流器控制
         """
-        try:
-            # 连接数据库
-            conn = sqlite3.connect('hs_rank.db')
-            
-            # 构建赛季名称（两种格式）
-            season_name1 = f'第{season}赛季'  # 文本格式
-            season_name2 = season  # 数字格式
-            
-            # 查询指定赛季的数据（同时查询两种格式）
-            query = '''
-            SELECT rank, player, score
-            FROM simplified_rank_data
-            WHERE season = ? OR season = ?
-            ORDER BY score DESC
-            LIMIT 500
-            '''
-            
-            # 执行查询
-            cursor = conn.cursor()
-            cursor.execute(query, (season_name1, season_name2))
+        modes = list(modes)
+        if not modes:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=len(modes)) as executor:
+            results = executor.map(
+                lambda mode: self.get_rank_data(mode, server, player_class, rank_range, season), modes)
+            return dict(zip(modes, results))
+    
+    def iter_rank_data(self, mode, server, player_class, rank_range, season, cancel_token=None):
+        """
+        流式获取排行榜数据，每完成一页产出(已完成页数, 总页数, 本页数据)
+        分页按完成顺序产出，本页数据为排名范围内的Leaderboard；cancel_token被取消后停止获取后续分页
+        """
+        current_season = self.config_manager.get_current_season()
+        history_seasons = self.config_manager.get_history_seasons()
+        
+        # 解析排名范围
+        start, end = parse_rank_range(rank_range)
+        
+        # 检查是否为历史赛季（数据库查询一次完成）
+        if int(season) in history_seasons:
+            with metrics.timer('db.get_season_data'):
+                db_data = self.get_data_from_database(mode, server, season, start, end)
+            yield 1, 1, db_data
+            return
+        
+        # 获取模式处理器（缓存的单例）
+        mode_handler = self.mode_manager.get_mode_handler(mode)
+        
+        # 按模式声明的页大小，只获取覆盖排名范围的分页
+        page_size = mode_handler.page_size
+        pages = get_window_pages(start, end, page_size)
+        
+        # 获取模式对应的API参数
+        api_params = mode_handler.get_api_params(current_season)
+        mode_name = api_params.get('mode_name', 'undergroundarena')
+        season_id = api_params.get('season_id', current_season)
+        
+        # 并发获取分页，每完成一页立即解析并产出；排行榜提前结束时总页数随之减少
+        page_fetcher = self.get_page_fetcher(server)
+        page_iter = page_fetcher.iter_window(mode_name, season_id, start, end, page_size, cancel_token)
+        for completed, (page, data, last_page) in enumerate(page_iter, 1):
+            # 使用模式处理器解析数据
+            with metrics.timer('query.parse'):
+                parsed_data = mode_handler.parse_api_data(data)
             
-            # 获取数据并转换格式
-            db_data = cursor.fetchall()
+            # 过滤排名范围内的数据
+            with metrics.timer('query.filter'):
+                rows = parsed_data.filter_rank(start, end)
             
-            conn.close()
+            # 已产出的分页都不超过最后一页，总页数不会小于已完成页数
+            yield completed, max(completed, last_page - pages[0] + 1), rows
+    
+    def get_global_rank_data(self, mode, servers, rank_range, season, cancel_token=None):
+        """
+        跨服务器合并排行榜：并发获取各服务器数据，按积分k路归并出全局排名区间
+        servers为None时合并所有已启用的服务器，返回(全局排名, 玩家, 积分, 服务器, 服务器排名)列表
+        每个服务器最多读取到第end名，归并到第end名后停止所有服务器的获取
+        """
+        start, end = parse_rank_range(rank_range)
+        servers = list(servers or [name for name, region in self.regions.items() if region.enabled])
+        # 未启用的服务器在开始获取前报错
+        for server in servers:
+            self.get_page_fetcher(server)
+        
+        # 归并结束（或调用方取消）后停止所有后台获取
+        token = CancelToken(cancel_token)
+        try:
+            # 每个服务器在后台线程中提前获取，最多缓冲若干页
+            streams = {
+                server: prefetch(self.iter_region_rows(mode, server, season, end, token), token, maxsize=PREFETCH_ROWS)
+                for server in servers
+            }
+            with metrics.timer('query.merge'):
+                return merge_by_score(streams, start, end)
+        finally:
+            token.cancel()
+    
+    def iter_region_rows(self, mode, server, season, max_rank, cancel_token=None):
+        """
+        按排名顺序逐行产出某个服务器的前max_rank名(rank, player, score)
+        分页按批并发获取；获取失败或分页返回错误时抛出异常，缺少该服务器的合并排名不能当作完整结果
+        """
+        try:
+            # 历史赛季从数据库读取（按积分从高到低）
+            if int(season) in self.config_manager.get_history_seasons():
+                yield from self.db_manager.get_season_data(season, limit=max_rank, mode=mode, server=server)
+                return
             
-            # 转换数据格式为 [rank, player, score]
-            formatted_data = []
+            current_season = self.config_manager.get_current_season()
+            mode_handler = self.mode_manager.get_mode_handler(mode)
+            api_params = mode_handler.get_api_params(current_season)
+            mode_name = api_params.get('mode_name', 'undergroundarena')
+            season_id = api_params.get('season_id', current_season)
+            page_size = mode_handler.page_size
+            page_fetcher = self.get_page_fetcher(server)
+            
+            pages = list(get_window_pages(1, max_rank, page_size))
+            batch_size = page_fetcher.max_workers
+            for offset in range(0, len(pages), batch_size):
+                batch = pages[offset:offset + batch_size]
+                responses = dict(page_fetcher.iter_pages(mode_name, season_id, batch, page_size, cancel_token))
+                
+                for page in batch:
+                    if page not in responses:
+                        return  # 已取消
+                    data = responses[page]
+                    if data.get('code') != 0:
+                        raise ValueError(f'第 {page} 页返回错误: {data.get("message")}')
+                    rows = mode_handler.parse_api_data(data)
+                    rows.sort(by='rank')
+                    yield from rows
+                    
+                    # 不满一页说明该服务器的排行榜已结束
+                    if len(rows) < page_size:
+                        return
+        except Exception as e:
+            raise RuntimeError(f"获取{server}排行榜失败: {e}") from e
+    
+    def get_data_from_database(self, mode, server, season, start=None, end=None):
+        """
+        从数据库获取历史赛季数据，指定排名区间时只读取区间内的排名
+        """
+        try:
+            # 按整数赛季号走索引查询（兼容"第N赛季"和纯数字两种格式）
+            if start is None:
+                db_data = self.db_manager.get_season_data(season, limit=500, mode=mode, server=server)
+            else:
+                db_data = self.db_manager.get_season_data(season, limit=None, mode=mode, server=server,
+                                                          start_rank=start, end_rank=end)
+            
+            # 转换为排行榜数据
+            formatted_data = Leaderboard()
             for idx, row in enumerate(db_data, 1):
                 # 使用数据库中存储的排名，如果没有则使用行号
                 rank = row[0] if row[0] else idx
-                formatted_data.append([rank, row[1], row[2]])
+                formatted_data.append(rank, row[1], row[2])
             
             return formatted_data
             
         except Exception as e:
             print(f"数据库查询失败: {e}")
-            return []
-    
+            return Leaderboard()
@@ -0,0 +1,208 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, quote
+
+# 本地排行榜API模拟服务器
+# 实现 /hs-rank-api-server/api/game/ranks 的分页约定：code、data.list、position、battle_tag、score
+# response_format='blizzard' 时模拟暴雪排行榜API：leaderboardId、seasonId、page参数，每页固定25人，
+# 返回leaderboard.rows中的rank、accountid、rating，用于测试多服务器合并
+#
+# 单独运行：python benchmarks/fake_server.py --port 8000 --size 5000 --latency 0.05
+# 然后在config.json中设置 "api_base_url": "http://127.0.0.1:8000/hs-rank-api-server/api/game/ranks"
+# 模拟其他服务器：python benchmarks/fake_server.py --port 8001 --format blizzard --score-offset 50
+# 然后在config.json中设置 "regions": {"欧服": {"enabled": true, "base_url": "http://127.0.0.1:8001/..."}}
+
+API_PATH = '/hs-rank-api-server/api/game/ranks'
+
+# 暴雪排行榜API的固定每页人数
+BLIZZARD_PAGE_SIZE = 25
+
+
+class FakeLeaderboardServer:
+    """
+    可配置延迟、错误率和排行榜大小的模拟服务器
+    """
+    def __init__(self, host='127.0.0.1', port=0, size=5000, latency=0.0, jitter=0.0, error_rate=0.0, seed=0,
+                 response_format='cn', score_offset=0):
+        self.size = size
+        self.response_format = response_format
+        # 积分偏移，多个服务器使用不同偏移时合并结果相互交错
+        self.score_offset = score_offset
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        # 请求统计
+        self.request_count = 0
+        self.error_count = 0
+        
+        handler = self.make_handler()
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+    
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}{API_PATH}'
+    
+    def start(self):
+        """
+        在后台线程中启动服务器
+        """
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        """
+        停止服务器
+        """
+        self.httpd.shutdown()
+        self.httpd.server_close()
+    
+    def reset_stats(self):
+        with self.lock:
+            self.request_count = 0
+            self.error_count = 0
+    
+    def get_leaderboard_size(self, mode_name, season_id):
+        """
+        排行榜大小，子类可按模式或赛季返回不同的值
+        """
+        return self.size
+    
+    def build_page(self, mode_name, season_id, page, page_size):
+        """
+        生成一页数据（同一赛季的数据固定不变）
+        """
+        size = self.get_leaderboard_size(mode_name, season_id)
+        first = (page - 1) * page_size
+        items = [
+            {
+                'position': position,
+                'battle_tag': f'{mode_name}玩家{season_id}_{position}#{1000 + position % 9000}',
+                'score': 100000 + self.score_offset - position * 7
+            }
+            for position in range(first + 1, min(first + page_size, size) + 1)
+        ]
+        return {'code': 0, 'message': 'success', 'data': {'list': items, 'total': size}}
+    
+    def build_blizzard_page(self, leaderboard_id, season_id, page):
+        """
+        以暴雪排行榜API的格式生成一页数据
+        """
+        data = self.build_page(leaderboard_id, season_id, page, BLIZZARD_PAGE_SIZE)['data']
+        size = data['total']
+        return {
+            'seasonId': season_id,
+            'leaderboardId': leaderboard_id,
+            'leaderboard': {
+                'rows': [
+                    {'rank': item['position'], 'accountid': item['battle_tag'], 'rating': item['score']}
+                    for item in data['list']
+                ],
+                'pagination': {'totalPages': (size + BLIZZARD_PAGE_SIZE - 1) // BLIZZARD_PAGE_SIZE, 'totalSize': size}
+            }
+        }
+    
+    def should_fail(self):
+        with self.lock:
+            self.request_count += 1
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.error_count += 1
+                return True
+        return False
+    
+    def get_delay(self):
+        with self.lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+    
+    def make_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def send_body(self, status, body, headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != API_PATH:
+                    self.send_body(404, b'')
+                    return
+                
+                time.sleep(server.get_delay())
+                if server.should_fail():
+                    self.send_body(503, b'', {'Retry-After': '0'})
+                    return
+                
+                query = parse_qs(url.query)
+                blizzard = server.response_format == 'blizzard'
+                try:
+                    page = max(1, int(query.get('page', ['1'])[0]))
+                    page_size = BLIZZARD_PAGE_SIZE if blizzard else max(1, int(query.get('page_size', ['25'])[0]))
+                except ValueError:
+                    self.send_body(200, json.dumps({'code': 1, 'message': 'bad params'}).encode('utf-8'))
+                    return
+                if blizzard:
+                    mode_name = query.get('leaderboardId', ['undergroundarena'])[0]
+                    season_id = query.get('seasonId', ['1'])[0]
+                else:
+                    mode_name = query.get('mode_name', ['undergroundarena'])[0]
+                    season_id = query.get('season_id', ['1'])[0]
+                
+                # 支持ETag条件请求（模式名可能是中文，头部中需要转义）
+                size = server.get_leaderboard_size(mode_name, season_id)
+                etag = f'"{quote(mode_name)}-{season_id}-{page}-{page_size}-{size}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_body(304, b'', {'ETag': etag})
+                    return
+                
+                if blizzard:
+                    data = server.build_blizzard_page(mode_name, season_id, page)
+                else:
+                    data = server.build_page(mode_name, season_id, page, page_size)
+                body = json.dumps(data).encode('utf-8')
+                self.send_body(200, body, {'Content-Type': 'application/json', 'ETag': etag})
+        
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地排行榜API模拟服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--size', type=int, default=5000, help='每个赛季的排行榜人数')
+    parser.add_argument('--latency', type=float, default=0.05, help='每个请求的延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='延迟的随机波动（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回503的概率')
+    parser.add_argument('--format', choices=['cn', 'blizzard'], default='cn', help='响应格式')
+    parser.add_argument('--score-offset', type=int, default=0, help='积分偏移')
+    args = parser.parse_args()
+    
+    server = FakeLeaderboardServer(args.host, args.port, args.size, args.latency, args.jitter, args.error_rate,
+                                   response_format=args.format, score_offset=args.score_offset)
+    print(f'模拟服务器已启动: {server.base_url}')
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# 获取和存储性能基准测试
+# 启动本地模拟服务器，在临时目录中测量 APIHandler.get_rank_data、import_season_data
+# 以及 DatabaseManager 的写入和读取，输出吞吐量和 p50/p99 延迟
+#
+# 用法：python benchmarks/run_benchmarks.py [--iterations 10] [--latency 0.05] [--error-rate 0.02] [--json result.json]
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, PROJECT_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+from fake_server import FakeLeaderboardServer
+
+
+def percentile(values, percent):
+    """
+    计算百分位数（最近秩法）
+    """
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def measure(name, iterations, func, units_per_call, unit, setup=None):
+    """
+    重复执行func并统计延迟，units_per_call为每次调用处理的数据量（用于计算吞吐量）
+    """
+    durations = []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    
+    total = sum(durations)
+    return {
+        'name': name,
+        'iterations': iterations,
+        'p50_ms': percentile(durations, 50) * 1000,
+        'p99_ms': percentile(durations, 99) * 1000,
+        'mean_ms': total / iterations * 1000,
+        'throughput': units_per_call * iterations / total if total else float('inf'),
+        'unit': unit
+    }
+
+
+def write_config(args, base_url):
+    """
+    在当前目录写入指向模拟服务器的配置
+    """
+    config = {
+        'current_season': 5,
+        'history_seasons': [1, 2, 3, 4],
+        'api_base_url': base_url,
+        'max_concurrent_requests': args.concurrency,
+        'request_timeout': 10,
+        'max_retries': 5,
+        'rate_limit': args.rate_limit,
+        # 基准测试测量网络请求，关闭响应缓存
+        'cache_enabled': False
+    }
+    with open('config.json', 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+
+def run(args):
+    server = FakeLeaderboardServer(size=args.size, latency=args.latency, jitter=args.jitter,
+                                   error_rate=args.error_rate).start()
+    write_config(args, server.base_url)
+    
+    from api_handler import APIHandler
+    from database import DatabaseManager
+    from import_history_data import import_season_data
+    
+    results = []
+    
+    # 1. 当前赛季查询（前500名，20页）
+    api_handler = APIHandler()
+    results.append(measure(
+        'get_rank_data 1-500', args.iterations,
+        lambda: api_handler.get_rank_data('地下竞技场', '国服', '全部', '1-500', '5'),
+        500, 'rows/s'
+    ))
+    
+    # 2. 历史赛季导入（每次导入到新的数据库）
+    databases = []
+    
+    def new_database():
+        databases.append(DatabaseManager(f'import_{len(databases)}.db'))
+    
+    results.append(measure(
+        f'import_season_data {args.size} rows', args.import_iterations,
+        lambda: import_season_data('第1赛季', 1, databases[-1]),
+        args.size, 'rows/s', setup=new_database
+    ))
+    
+    # 3. 数据库写入：首次写入整个赛季，以及只有少量排名变化的重复刷新
+    db_manager = DatabaseManager('bench.db')
+    rows = [(rank, f'玩家{rank}#{1000 + rank % 9000}', 100000 - rank * 7) for rank in range(1, args.size + 1)]
+    refreshed = [(rank, player, score + (1 if rank % 100 == 0 else 0)) for rank, player, score in rows]
+    
+    def clear_season():
+        with db_manager.get_connection() as conn:
+            conn.execute('DELETE FROM simplified_rank_data WHERE season_num = 5')
+    
+    results.append(measure(
+        f'save_data full {args.size} rows', args.iterations,
+        lambda: db_manager.save_data(rows, '第5赛季', '地下竞技场', '国服'),
+        args.size, 'rows/s', setup=clear_season
+    ))
+    
+    state = {'toggle': False}
+    
+    def refresh():
+        state['toggle'] = not state['toggle']
+        db_manager.save_data(refreshed if state['toggle'] else rows, '第5赛季', '地下竞技场', '国服')
+    
+    results.append(measure(
+        f'save_data refresh {args.size} rows', args.iterations, refresh, args.size, 'rows/s'
+    ))
+    
+    # 4. 数据库读取
+    import_season_data('第1赛季', 1, db_manager)
+    results.append(measure(
+        'get_season_data 500', args.iterations * 10,
+        lambda: db_manager.get_season_data(1, limit=500), 500, 'rows/s'
+    ))
+    results.append(measure(
+        'search_players', args.iterations * 10,
+        lambda: db_manager.search_players('玩家1_12'), 1, 'queries/s'
+    ))
+    
+    server.stop()
+    
+    # 输出结果
+    print(f'模拟服务器: 排行榜 {args.size} 人，延迟 {args.latency * 1000:.0f}ms，错误率 {args.error_rate:.1%}，'
+          f'请求 {server.request_count} 次（失败 {server.error_count} 次）')
+    print(f'{"基准":<32}{"次数":>6}{"p50(ms)":>12}{"p99(ms)":>12}{"平均(ms)":>12}{"吞吐量":>16}')
+    for result in results:
+        print(f'{result["name"]:<32}{result["iterations"]:>6}{result["p50_ms"]:>12.2f}{result["p99_ms"]:>12.2f}'
+              f'{result["mean_ms"]:>12.2f}{result["throughput"]:>12.0f} {result["unit"]}')
+    
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='排行榜获取和存储性能基准测试')
+    parser.add_argument('--iterations', type=int, default=10, help='每项基准的重复次数')
+    parser.add_argument('--import-iterations', type=int, default=3, help='赛季导入的重复次数')
+    parser.add_argument('--size', type=int, default=5000, help='模拟排行榜人数')
+    parser.add_argument('--latency', type=float, default=0.05, help='模拟请求延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.01, help='模拟延迟的随机波动（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='模拟服务器返回503的概率')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发请求数上限')
+    parser.add_argument('--rate-limit', type=float, default=0, help='每秒请求数上限，0表示不限速')
+    parser.add_argument('--json', help='将结果写入JSON文件')
+    args = parser.parse_args()
+    
+    json_path = os.path.abspath(args.json) if args.json else None
+    
+    # 在临时目录中运行，避免改动项目目录中的数据库、缓存和配置
+    workdir = tempfile.mkdtemp(prefix='hs_rank_bench_')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        results = run(args)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
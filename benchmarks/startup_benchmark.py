@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# 启动时间基准测试：在独立进程中启动主窗口，记录导入耗时、窗口创建耗时和首次绘制时间
+#
+# 用法：python benchmarks/startup_benchmark.py [--runs 10] [--budget 1000] [--db hs_rank.db]
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_child():
+    """
+    子进程：启动程序直到首次绘制，输出各阶段耗时（毫秒，JSON格式）
+    """
+    start = time.perf_counter()
+    sys.path.insert(0, PROJECT_DIR)
+    
+    from PyQt5.QtCore import QObject, QEvent, QTimer
+    from PyQt5.QtWidgets import QApplication
+    import main
+    imported = time.perf_counter()
+    
+    app = QApplication(sys.argv[:1])
+    window = main.HsRankQuery()
+    created = time.perf_counter()
+    
+    timings = {}
+    
+    class FirstPaintFilter(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and 'first_paint_ms' not in timings:
+                timings['first_paint_ms'] = (time.perf_counter() - start) * 1000
+                QTimer.singleShot(0, app.quit)
+            return False
+    
+    paint_filter = FirstPaintFilter()
+    window.installEventFilter(paint_filter)
+    window.show()
+    # 防止平台不产生绘制事件时一直等待
+    QTimer.singleShot(10000, app.quit)
+    app.exec_()
+    
+    timings['import_ms'] = (imported - start) * 1000
+    timings['window_ms'] = (created - imported) * 1000
+    print(json.dumps(timings))
+
+
+def run_once(workdir):
+    """
+    启动一次子进程并返回各阶段耗时，另外记录进程总耗时
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child'],
+        cwd=workdir, capture_output=True, text=True, check=True
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['process_ms'] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量程序启动到首次绘制的时间')
+    parser.add_argument('--runs', type=int, default=10, help='启动次数')
+    parser.add_argument('--budget', type=float, default=1000, help='首次绘制时间中位数上限（毫秒），超过时返回非零退出码')
+    parser.add_argument('--db', help='复制到工作目录中使用的数据库文件（默认使用空数据库）')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        run_child()
+        return 0
+    
+    # 在临时目录中运行，避免改动项目目录中的数据库和配置
+    workdir = tempfile.mkdtemp(prefix='hs_rank_startup_')
+    try:
+        shutil.copy(os.path.join(PROJECT_DIR, 'style.qss'), workdir)
+        if args.db:
+            shutil.copy(args.db, os.path.join(workdir, 'hs_rank.db'))
+        
+        results = [run_once(workdir) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    print(f'启动次数: {args.runs}')
+    for key in ('import_ms', 'window_ms', 'first_paint_ms', 'process_ms'):
+        values = [result[key] for result in results if key in result]
+        if values:
+            print(f'{key:>15}: 中位数 {statistics.median(values):8.1f}  最大 {max(values):8.1f}')
+    
+    first_paint = statistics.median(result.get('first_paint_ms', float('inf')) for result in results)
+    if first_paint > args.budget:
+        print(f'首次绘制时间 {first_paint:.1f}ms 超过预算 {args.budget:.0f}ms')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+import argparse
+import contextlib
+import csv
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 命令行（无界面）入口：查询、导入、搜索和导出，不导入Qt，可在服务器或定时任务中运行
+#
+# 用法：
+#   python cli.py query --season 5 --range 1-500 [--mode 地下竞技场] [--server 国服] [--format csv] [--save]
+#   python cli.py query --merge --range 1-100 [--server 国服 --server 欧服]
+#   python cli.py import --season 1 --season 2 [--jobs 2]
+#   python cli.py search 玩家名 [--limit 20]
+#   python cli.py export data.csv [--season 5] [--mode 地下竞技场] [--server 国服]
+#
+# --season、--mode、--server 可以重复指定，多个组合会并发处理。结果输出到标准输出，进度和日志输出到标准错误。
+# --merge 将所选服务器（默认全部）按积分合并为跨服务器排名。
+
+QUERY_COLUMNS = ['season', 'mode', 'server', 'rank', 'player', 'score']
+MERGED_COLUMNS = ['season', 'mode', 'global_rank', 'player', 'score', 'server', 'server_rank']
+CAREER_COLUMNS = ['player', 'mode', 'server', 'seasons_played', 'best_rank', 'best_score', 'last_season']
+
+
+def write_rows(rows, columns, output_format, stream=None):
+    """
+    将结果行以JSON（对象数组）或CSV格式写入标准输出
+    """
+    stream = stream or sys.stdout
+    if output_format == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    else:
+        json.dump([dict(zip(columns, row)) for row in rows], stream, ensure_ascii=False, indent=2)
+        stream.write('\n')
+
+
+def log(message):
+    """
+    向标准错误输出一行进度信息（整行一次写入，并发任务的输出不会交错）
+    """
+    sys.stderr.write(message + '\n')
+
+
+def get_mode_names(modes):
+    """
+    将--mode参数（模式键或显示名称）转换为数据库中保存的显示名称，未知模式抛出ValueError
+    """
+    from modes import ModeManager
+    
+    mode_manager = ModeManager()
+    for mode in modes:
+        if not mode_manager.has_mode(mode):
+            raise ValueError(f'未知模式: {mode}（可选: {", ".join(mode_manager.get_mode_names())}）')
+    return [mode_manager.get_display_name(mode) for mode in modes]
+
+
+def run_concurrently(func, tasks, jobs):
+    """
+    用线程池并发执行func(*task)，按任务顺序返回结果
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(tasks)))) as executor:
+        return list(executor.map(lambda task: func(*task), tasks))
+
+
+def command_query(args):
+    from api_handler import APIHandler
+    from database import DatabaseManager, DEFAULT_MODE, DEFAULT_SERVER
+    from page_fetcher import parse_rank_range
+    
+    rank_range = parse_rank_range(args.range)
+    if args.merge:
+        return command_merged_query(args)
+    
+    modes = get_mode_names(args.mode or [DEFAULT_MODE])
+    servers = args.server or [DEFAULT_SERVER]
+    seasons = args.season or [None]
+    
+    api_handler = APIHandler(DatabaseManager(args.db))
+    season_default = api_handler.config_manager.get_current_season()
+    tasks = [(season if season is not None else season_default, server)
+             for season in seasons for server in servers]
+    
+    def query(season, server):
+        # 同一赛季和服务器的多个模式同时获取
+        start = time.perf_counter()
+        results = api_handler.get_multi_mode_data(modes, server, '全部', args.range, str(season))
+        
+        rows = []
+        for mode, data in results.items():
+            log(f'第{season}赛季 {mode} {server}: {len(data)} 条，耗时 {time.perf_counter() - start:.2f}s')
+            if args.save and data:
+                api_handler.db_manager.save_data(data, f'第{season}赛季', mode, server, rank_range)
+            rows.extend((season, mode, server) + tuple(row) for row in data)
+        return rows
+    
+    results = run_concurrently(query, tasks, args.jobs)
+    rows = [row for result in results for row in result]
+    return rows, QUERY_COLUMNS, 0 if rows else 1
+
+
+def command_merged_query(args):
+    from api_handler import APIHandler
+    from database import DatabaseManager, DEFAULT_MODE
+    
+    modes = get_mode_names(args.mode or [DEFAULT_MODE])
+    seasons = args.season or [None]
+    
+    api_handler = APIHandler(DatabaseManager(args.db))
+    season_default = api_handler.config_manager.get_current_season()
+    tasks = [(season if season is not None else season_default, mode) for season in seasons for mode in modes]
+    
+    def query(season, mode):
+        # 所选服务器（未指定时为全部服务器）并发获取并按积分合并
+        start = time.perf_counter()
+        data = api_handler.get_global_rank_data(mode, args.server, args.range, str(season))
+        log(f'第{season}赛季 {mode} 跨服务器: {len(data)} 条，耗时 {time.perf_counter() - start:.2f}s')
+        if args.save and data:
+            api_handler.db_manager.save_merged_data(data, f'第{season}赛季', mode)
+        return [(season, mode) + tuple(row) for row in data]
+    
+    results = run_concurrently(query, tasks, args.jobs)
+    rows = [row for result in results for row in result]
+    return rows, MERGED_COLUMNS, 0 if rows else 1
+
+
+def command_import(args):
+    from config import ConfigManager
+    from database import DatabaseManager
+    from import_scheduler import ImportScheduler, STATUS_FETCHING, STATUS_DONE, STATUS_SKIPPED
+    
+    db_manager = DatabaseManager(args.db)
+    # 未指定赛季时导入配置中的所有历史赛季
+    seasons = args.season or ConfigManager().get_history_seasons()
+    
+    statuses = {}
+    
+    def on_progress(season_num, status, completed, total):
+        statuses[season_num] = status
+        # 获取进度只在每10%输出一次
+        if status != STATUS_FETCHING:
+            log(f'第{season_num}赛季: {status}')
+        elif total and completed * 10 // total != (completed - 1) * 10 // total:
+            log(f'第{season_num}赛季: {completed}/{total} 页')
+    
+    # 各赛季同时导入，总请求数受共享HTTP客户端的限速和并发上限约束
+    scheduler = ImportScheduler(db_manager, max(1, args.jobs), on_progress)
+    futures = scheduler.submit(seasons)
+    results = [(season, futures[season].result()) for season in seasons]
+    scheduler.shutdown()
+    
+    # 已存在而跳过的赛季不算失败
+    rows = [(season, imported, statuses.get(season) in (STATUS_DONE, STATUS_SKIPPED)) for season, imported in results]
+    return rows, ['season', 'imported', 'ok'], 0 if all(row[2] for row in rows) else 1
+
+
+def command_search(args):
+    from database import DatabaseManager
+    
+    db_manager = DatabaseManager(args.db)
+    rows = db_manager.get_player_career(args.name)[:args.limit]
+    return rows, CAREER_COLUMNS, 0 if rows else 1
+
+
+def command_export(args):
+    from database import DatabaseManager
+    from exporter import DataExporter
+    
+    db_manager = DatabaseManager(args.db)
+    
+    # 多个赛季、模式或服务器的组合分别导出到各自的文件
+    combinations = [(season, mode, server)
+                    for season in (args.season or [None])
+                    for mode in (get_mode_names(args.mode) if args.mode else [None])
+                    for server in (args.server or [None])]
+    
+    def export(season, mode, server):
+        filename = args.file
+        if len(combinations) > 1:
+            stem, dot, extension = filename.rpartition('.')
+            suffix = '_'.join(str(part) for part in (season, mode, server) if part is not None)
+            filename = f'{stem}_{suffix}.{extension}' if dot else f'{filename}_{suffix}'
+        count = DataExporter(db_manager).export(filename, season, mode, server)
+        log(f'已导出 {count} 条数据到 {filename}')
+        return filename, count
+    
+    rows = run_concurrently(export, combinations, args.jobs)
+    return rows, ['file', 'rows'], 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='炉石传说排行榜查询工具（命令行模式）')
+    parser.add_argument('--db', default='hs_rank.db', help='数据库文件')
+    parser.add_argument('--format', choices=['json', 'csv'], default='json', help='标准输出的结果格式')
+    parser.add_argument('--jobs', type=int, default=4, help='并发处理的赛季/模式组合数')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    # 子命令也接受--jobs（写在子命令之后），未指定时保留全局选项的值
+    jobs_parser = argparse.ArgumentParser(add_help=False)
+    jobs_parser.add_argument('--jobs', type=int, default=argparse.SUPPRESS, help='并发处理的赛季/模式组合数')
+    
+    query_parser = subparsers.add_parser('query', help='查询排行榜（当前赛季在线获取，历史赛季读取数据库）', parents=[jobs_parser])
+    query_parser.add_argument('--season', type=int, action='append', help='赛季号，可重复指定，默认当前赛季')
+    query_parser.add_argument('--mode', action='append', help='模式（键值或显示名称，如 standard 或 标准模式），可重复指定，默认地下竞技场')
+    query_parser.add_argument('--server', action='append', help='服务器，可重复指定，默认国服')
+    query_parser.add_argument('--range', default='1-500', help='排名范围，如 1-500 或 4000-4100')
+    query_parser.add_argument('--save', action='store_true', help='将查询结果保存到数据库')
+    query_parser.add_argument('--merge', action='store_true', help='按积分合并所选服务器（默认全部）的排名')
+    query_parser.set_defaults(handler=command_query)
+    
+    import_parser = subparsers.add_parser('import', help='导入历史赛季数据', parents=[jobs_parser])
+    import_parser.add_argument('--season', type=int, action='append', help='赛季号，可重复指定，默认配置中的所有历史赛季')
+    import_parser.set_defaults(handler=command_import)
+    
+    search_parser = subparsers.add_parser('search', help='按名字搜索玩家生涯数据')
+    search_parser.add_argument('name', help='玩家名字或战网ID')
+    search_parser.add_argument('--limit', type=int, default=20, help='最多返回的玩家数')
+    search_parser.set_defaults(handler=command_search)
+    
+    export_parser = subparsers.add_parser('export', help='导出数据库数据到文件（csv/parquet/xlsx）', parents=[jobs_parser])
+    export_parser.add_argument('file', help='导出文件名')
+    export_parser.add_argument('--season', type=int, action='append', help='赛季号，可重复指定，默认全部')
+    export_parser.add_argument('--mode', action='append', help='模式（键值或显示名称），可重复指定，默认全部')
+    export_parser.add_argument('--server', action='append', help='服务器，可重复指定，默认全部')
+    export_parser.set_defaults(handler=command_export)
+    
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    
+    # 各模块的进度信息输出到标准错误，标准输出只保留结果
+    stdout = sys.stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            rows, columns, exit_code = args.handler(args)
+    except ValueError as e:
+        print(f'参数错误: {e}', file=sys.stderr)
+        return 2
+    except RuntimeError as e:
+        # 如跨服务器合并时某个服务器获取失败，不输出不完整的结果
+        print(f'查询失败: {e}', file=sys.stderr)
+        return 1
+    
+    write_rows(rows, columns, args.format, stdout)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
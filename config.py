@@ -3,23 +3,41 @@ import os
 
 # 配置管理模块
 
+# 国服排行榜API地址
+DEFAULT_API_BASE_URL = 'https://webapi.blizzard.cn/hs-rank-api-server/api/game/ranks'
+
 class ConfigManager:
+    # 已加载的配置，按文件路径缓存 {路径: (修改时间, 配置)}，多个实例共用同一份配置
+    loaded_configs = {}
+    
     def __init__(self, config_file='config.json'):
         self.config_file = config_file
         self.config = self.load_config()
     
     def load_config(self):
         """
-        加载配置文件
+        加载配置文件（文件未修改时直接使用缓存）
         """
-        if os.path.exists(self.config_file):
+        try:
+            mtime = os.path.getmtime(self.config_file)
+        except OSError:
+            mtime = None
+        
+        cached = self.loaded_configs.get(self.config_file)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        if mtime is not None:
             try:
                 with open(self.config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                    config = json.load(f)
             except:
-                return self.get_default_config()
+                config = self.get_default_config()
         else:
-            return self.get_default_config()
+            config = self.get_default_config()
+        
+        self.loaded_configs[self.config_file] = (mtime, config)
+        return config
     
     def get_default_config(self):
         """
@@ -27,7 +45,26 @@ class ConfigManager:
         """
         return {
             'current_season': 5,
-            'history_seasons': [1, 2, 3, 4]
+            'history_seasons': [1, 2, 3, 4],
+            'api_base_url': DEFAULT_API_BASE_URL,
+            'max_concurrent_requests': 8,
+            'request_timeout': 10,
+            'max_retries': 3,
+            'rate_limit': 20,
+            'rate_burst': 10,
+            'cache_enabled': True,
+            'cache_ttl': 300,
+            'cache_max_bytes': 50 * 1024 * 1024,
+            'snapshot_enabled': True,
+            'snapshot_interval': 1800,
+            'snapshot_rank_range': '1-500',
+            'snapshot_keyframe_interval': 24,
+            'snapshot_retention_days': 30,
+            'snapshot_compact_after_days': 7,
+            'regions': {},
+            'modes': {},
+            'import_parallel_seasons': 3,
+            'import_chunk_pages': 20
         }
     
     def save_config(self):
@@ -36,6 +73,9 @@ class ConfigManager:
         """
         with open(self.config_file, 'w', encoding='utf-8') as f:
             json.dump(self.config, f, ensure_ascii=False, indent=2)
+        
+        # 更新缓存，其他实例读取到的是同一份配置
+        self.loaded_configs[self.config_file] = (os.path.getmtime(self.config_file), self.config)
     
     def get_current_season(self):
         """
@@ -62,3 +102,122 @@ class ConfigManager:
         """
         self.config['history_seasons'] = list(range(1, current_season))
         self.save_config()
+    
+    def get_api_base_url(self):
+        """
+        获取排行榜API地址（可指向本地测试服务器）
+        """
+        return self.config.get('api_base_url', DEFAULT_API_BASE_URL)
+    
+    def get_max_concurrent_requests(self):
+        """
+        获取并发请求数上限
+        """
+        return max(1, int(self.config.get('max_concurrent_requests', 8)))
+    
+    def get_request_timeout(self):
+        """
+        获取单次请求超时时间（秒）
+        """
+        return float(self.config.get('request_timeout', 10))
+    
+    def get_max_retries(self):
+        """
+        获取请求失败后的最大重试次数
+        """
+        return max(0, int(self.config.get('max_retries', 3)))
+    
+    def get_rate_limit(self):
+        """
+        获取请求速率上限（每秒请求数），0表示不限速
+        """
+        return float(self.config.get('rate_limit', 20))
+    
+    def get_rate_burst(self):
+        """
+        获取允许的突发请求数
+        """
+        return float(self.config.get('rate_burst', 10))
+    
+    def get_import_parallel_seasons(self):
+        """
+        获取同时导入的历史赛季数上限
+        """
+        return max(1, int(self.config.get('import_parallel_seasons', 3)))
+    
+    def get_import_chunk_pages(self):
+        """
+        获取导入历史赛季时每次提交的页数
+        """
+        return max(1, int(self.config.get('import_chunk_pages', 20)))
+    
+    def get_cache_enabled(self):
+        """
+        获取是否启用排行榜响应缓存
+        """
+        return bool(self.config.get('cache_enabled', True))
+    
+    def get_cache_ttl(self):
+        """
+        获取响应缓存有效期（秒）
+        """
+        return float(self.config.get('cache_ttl', 300))
+    
+    def get_cache_max_bytes(self):
+        """
+        获取响应缓存容量上限（字节）
+        """
+        return int(self.config.get('cache_max_bytes', 50 * 1024 * 1024))
+    
+    def get_regions(self):
+        """
+        获取各服务器的API配置（默认配置与config.json中的regions合并）
+        """
+        from regions import DEFAULT_REGIONS
+        
+        regions = {name: dict(settings) for name, settings in DEFAULT_REGIONS.items()}
+        for name, settings in (self.config.get('regions') or {}).items():
+            regions.setdefault(name, {}).update(settings)
+        return regions
+    
+    def get_mode_settings(self, mode_key):
+        """
+        获取模式的附加配置（config.json中modes下以模式键为名的配置），未配置时返回空字典
+        """
+        return (self.config.get('modes') or {}).get(mode_key) or {}
+    
+    def get_snapshot_enabled(self):
+        """
+        获取是否在后台定时保存当前赛季排行榜快照
+        """
+        return bool(self.config.get('snapshot_enabled', True))
+    
+    def get_snapshot_interval(self):
+        """
+        获取排行榜快照间隔（秒）
+        """
+        return max(60, int(self.config.get('snapshot_interval', 1800)))
+    
+    def get_snapshot_rank_range(self):
+        """
+        获取快照记录的排名范围
+        """
+        return self.config.get('snapshot_rank_range', '1-500')
+    
+    def get_snapshot_keyframe_interval(self):
+        """
+        获取每隔多少个快照保存一次完整排行榜
+        """
+        return max(1, int(self.config.get('snapshot_keyframe_interval', 24)))
+    
+    def get_snapshot_retention_days(self):
+        """
+        获取快照保留天数
+        """
+        return float(self.config.get('snapshot_retention_days', 30))
+    
+    def get_snapshot_compact_after_days(self):
+        """
+        获取多少天前的快照压缩为每小时一个
+        """
+        return float(self.config.get('snapshot_compact_after_days', 7))
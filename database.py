@@ -1,40 +1,114 @@
 import sqlite3
 import os
+import threading
+from difflib import SequenceMatcher
+from metrics import metrics
+
+
+def parse_season_number(season):
+    """
+    将赛季名称（"第5赛季"、"5"或5）解析为整数赛季号，无法解析时返回None
+    """
+    if isinstance(season, int):
+        return season
+    
+    text = str(season).strip()
+    if text.startswith('第') and text.endswith('赛季'):
+        text = text[1:-2]
+    
+    try:
+        return int(text)
+    except ValueError:
+        return None
+
+
+def strip_battle_tag_suffix(player):
+    """
+    去掉战网ID的#数字后缀，例如"玩家#1234"返回"玩家"
+    """
+    return str(player).split('#', 1)[0].strip()
+
+
+# 未记录模式和服务器的旧数据均来自国服地下竞技场
+DEFAULT_MODE = '地下竞技场'
+DEFAULT_SERVER = '国服'
+
+# 将战网ID转换为不带后缀名字的SQL表达式
+PLAYER_NAME_SQL = "TRIM(CASE WHEN instr({0}, '#') > 0 THEN substr({0}, 1, instr({0}, '#') - 1) ELSE {0} END)"
 
 
 class DatabaseManager:
-    def __init__(self, db_path='hs_rank.db'):
+    def __init__(self, db_path='hs_rank.db', auto_init=True):
         self.db_path = db_path
-        self.init_db()
+        # 每个线程复用各自的数据库连接
+        self.local = threading.local()
+        # FTS5索引在init_db中检测，未初始化前按不可用处理
+        self.fts_enabled = False
+        # auto_init为False时由调用方稍后调用init_db（例如窗口显示之后）
+        if auto_init:
+            self.init_db()
+    
+    def get_connection(self):
+        """
+        获取当前线程的数据库连接，首次调用时创建并设置WAL模式和性能参数
+        """
+        conn = getattr(self.local, 'conn', None)
+        
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            # WAL模式下读操作不会被写操作阻塞
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA cache_size=-16000')  # 约16MB页缓存
+            conn.execute('PRAGMA mmap_size=268435456')  # 256MB内存映射
+            conn.execute('PRAGMA temp_store=MEMORY')
+            self.local.conn = conn
+        
+        return conn
+    
+    def close(self):
+        """
+        关闭当前线程的数据库连接
+        """
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
     
     def init_db(self):
         # 初始化数据库
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self.get_connection()
         
         # 创建简化的排行榜表（只保留核心数据）
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS simplified_rank_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            season TEXT,
-            player TEXT,
-            score INTEGER,
-            rank INTEGER,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with conn:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS simplified_rank_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                season TEXT,
+                player TEXT,
+                score INTEGER,
+                rank INTEGER,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
         
         # 检查并更新数据库结构
         self.check_and_update_db_structure()
+        
+        # 初始化玩家名字搜索索引
+        self.init_player_search_index()
+        
+        # 初始化玩家生涯汇总表
+        self.init_player_career()
+        
+        # 初始化历史赛季导入检查点表
+        self.init_import_checkpoints()
     
     def check_and_update_db_structure(self):
         """
-        检查并更新数据库结构，确保rank列存在
+        检查并更新数据库结构，确保rank列、整数赛季列、模式和服务器列存在，并创建查询索引
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         # 检查simplified_rank_data表结构
@@ -53,94 +127,575 @@ class DatabaseManager:
                 # 忽略错误
                 pass
         
-        conn.close()
+        # 如果不存在整数赛季列，添加它并从文本赛季回填
+        has_season_num_column = any(column[1] == 'season_num' for column in table_info)
+        if not has_season_num_column:
+            with conn:
+                conn.execute('ALTER TABLE simplified_rank_data ADD COLUMN season_num INTEGER')
+                # 兼容"第N赛季"和纯数字两种格式
+                conn.execute('''
+                UPDATE simplified_rank_data
+                SET season_num = CAST(REPLACE(REPLACE(season, '第', ''), '赛季', '') AS INTEGER)
+                WHERE season_num IS NULL
+                ''')
+        
+        # 如果不存在模式和服务器列，添加它们（旧数据使用默认值）
+        for column, default in (('mode', DEFAULT_MODE), ('server', DEFAULT_SERVER)):
+            if not any(info[1] == column for info in table_info):
+                with conn:
+                    conn.execute(f"ALTER TABLE simplified_rank_data ADD COLUMN {column} TEXT NOT NULL DEFAULT '{default}'")
+        
+        # 创建复合索引，历史赛季查询走索引范围扫描
+        with conn:
+            conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_rank_data_season_score
+            ON simplified_rank_data (season_num, score DESC)
+            ''')
+        
+        # 每个赛季、模式、服务器的每个排名只保留一行，作为增量写入的唯一键
+        has_unique_rank_index = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_rank_data_unique'"
+        ).fetchone() is not None
+        if not has_unique_rank_index:
+            with conn:
+                # 清理重复数据，保留最新写入的一行
+                conn.execute('''
+                DELETE FROM simplified_rank_data
+                WHERE rank IS NOT NULL AND id NOT IN (
+                    SELECT MAX(id) FROM simplified_rank_data
+                    WHERE rank IS NOT NULL
+                    GROUP BY season_num, mode, server, rank
+                )
+                ''')
+                conn.execute('DROP INDEX IF EXISTS idx_rank_data_season_rank')
+                conn.execute('DROP INDEX IF EXISTS idx_rank_data_season_rank_unique')
+                conn.execute('''
+                CREATE UNIQUE INDEX idx_rank_data_unique
+                ON simplified_rank_data (season_num, mode, server, rank)
+                ''')
     
-    def save_data(self, data, season, mode, server):
-        # 保存数据到数据库
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def init_player_search_index(self):
+        """
+        初始化玩家名字索引表和FTS5三元组全文索引，并通过触发器与排行榜数据保持同步
+        """
+        conn = self.get_connection()
         
-        # 先删除该赛季的所有旧数据
-        cursor.execute('DELETE FROM simplified_rank_data WHERE season = ?', (season,))
+        has_player_index = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'player_index'"
+        ).fetchone() is not None
         
-        for row in data:
-            try:
-                # 存储赛季、玩家、积分和排名数据
-                cursor.execute('''
-                INSERT INTO simplified_rank_data (season, player, score, rank)
-                VALUES (?, ?, ?, ?)
-                ''', (season, row[1], row[2], row[0]))
-            except Exception as e:
-                # 忽略错误
-                pass
+        with conn:
+            # 玩家名字表：每个战网ID一行，name为去掉#后缀的名字
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS player_index (
+                id INTEGER PRIMARY KEY,
+                player TEXT UNIQUE,
+                name TEXT
+            )
+            ''')
+            conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_rank_data_player
+            ON simplified_rank_data (player)
+            ''')
+            
+            # 写入排行榜数据时自动登记新玩家
+            # （用NOT EXISTS而不是INSERT OR IGNORE，因为外层UPSERT的冲突策略会覆盖触发器内的OR IGNORE）
+            player_name = PLAYER_NAME_SQL.format('NEW.player')
+            conn.execute('DROP TRIGGER IF EXISTS trg_rank_data_player_insert')
+            conn.execute(f'''
+            CREATE TRIGGER trg_rank_data_player_insert
+            AFTER INSERT ON simplified_rank_data
+            WHEN NEW.player IS NOT NULL
+            BEGIN
+                INSERT INTO player_index (player, name)
+                SELECT NEW.player, {player_name}
+                WHERE NOT EXISTS (SELECT 1 FROM player_index WHERE player = NEW.player);
+            END
+            ''')
+            conn.execute('DROP TRIGGER IF EXISTS trg_rank_data_player_update')
+            conn.execute(f'''
+            CREATE TRIGGER trg_rank_data_player_update
+            AFTER UPDATE OF player ON simplified_rank_data
+            WHEN NEW.player IS NOT NULL
+            BEGIN
+                INSERT INTO player_index (player, name)
+                SELECT NEW.player, {player_name}
+                WHERE NOT EXISTS (SELECT 1 FROM player_index WHERE player = NEW.player);
+            END
+            ''')
+        
+        # 创建FTS5三元组索引（SQLite 3.34+），不支持时退回到LIKE查询玩家名字表
+        try:
+            with conn:
+                conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS player_fts
+                USING fts5(name, content='player_index', content_rowid='id', tokenize='trigram')
+                ''')
+                conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS trg_player_index_insert
+                AFTER INSERT ON player_index
+                BEGIN
+                    INSERT INTO player_fts (rowid, name) VALUES (NEW.id, NEW.name);
+                END
+                ''')
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            print(f"FTS5三元组索引不可用，玩家搜索将使用LIKE查询: {e}")
+            self.fts_enabled = False
+        
+        # 首次创建时从已有数据回填
+        if not has_player_index:
+            with conn:
+                conn.execute(f'''
+                INSERT OR IGNORE INTO player_index (player, name)
+                SELECT DISTINCT player, {PLAYER_NAME_SQL.format('player')}
+                FROM simplified_rank_data
+                WHERE player IS NOT NULL
+                ''')
+    
+    def init_player_career(self):
+        """
+        初始化玩家生涯汇总表，写入赛季数据时增量维护，首次创建时从已有数据构建
+        player_season_best保存每个玩家在每个模式、服务器每个赛季的最好排名和最高积分，
+        player_career保存每个玩家在每个模式、服务器的生涯汇总
+        """
+        conn = self.get_connection()
+        
+        career_columns = [info[1] for info in conn.execute('PRAGMA table_info(player_career)')]
+        has_career = 'mode' in career_columns
+        
+        with conn:
+            # 旧版汇总表不区分模式和服务器，删除后按新结构重新构建
+            if career_columns and not has_career:
+                conn.execute('DROP TABLE IF EXISTS player_season_best')
+                conn.execute('DROP TABLE IF EXISTS player_career')
+            
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS player_season_best (
+                player TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                server TEXT NOT NULL,
+                season_num INTEGER NOT NULL,
+                best_rank INTEGER,
+                best_score INTEGER,
+                PRIMARY KEY (player, mode, server, season_num)
+            ) WITHOUT ROWID
+            ''')
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS player_career (
+                player TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                server TEXT NOT NULL,
+                seasons_played INTEGER NOT NULL,
+                best_rank INTEGER,
+                best_score INTEGER,
+                last_season INTEGER,
+                PRIMARY KEY (player, mode, server)
+            ) WITHOUT ROWID
+            ''')
+        
+        if not has_career:
+            self.rebuild_player_career()
+    
+    def init_import_checkpoints(self):
+        """
+        初始化历史赛季导入检查点表，记录每个赛季已提交的最后一页和总页数，中断的导入从下一页继续
+        """
+        conn = self.get_connection()
         
-        conn.commit()
-        conn.close()
+        with conn:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS import_checkpoints (
+                season_num INTEGER NOT NULL,
+                mode TEXT NOT NULL,
+                server TEXT NOT NULL,
+                last_page INTEGER NOT NULL DEFAULT 0,
+                total_pages INTEGER,
+                completed INTEGER NOT NULL DEFAULT 0,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (season_num, mode, server)
+            ) WITHOUT ROWID
+            ''')
     
-    def get_data(self, mode, server):
-        # 从数据库获取数据
-        conn = sqlite3.connect(self.db_path)
-        query = '''
-        SELECT season, player, score
+    def rebuild_player_career(self):
+        """
+        根据排行榜数据重新构建玩家生涯汇总表
+        """
+        conn = self.get_connection()
+        
+        with conn:
+            conn.execute('DELETE FROM player_season_best')
+            conn.execute('DELETE FROM player_career')
+            conn.execute('''
+            INSERT INTO player_season_best (player, mode, server, season_num, best_rank, best_score)
+            SELECT player, mode, server, season_num, MIN(rank), MAX(score)
+            FROM simplified_rank_data
+            WHERE player IS NOT NULL AND season_num IS NOT NULL
+            GROUP BY player, mode, server, season_num
+            ''')
+            conn.execute('''
+            INSERT INTO player_career (player, mode, server, seasons_played, best_rank, best_score, last_season)
+            SELECT player, mode, server, COUNT(*), MIN(best_rank), MAX(best_score), MAX(season_num)
+            FROM player_season_best
+            GROUP BY player, mode, server
+            ''')
+    
+    def update_player_career(self, conn, season_num, players, mode, server):
+        """
+        重新计算指定玩家在某个模式、服务器某赛季的最好成绩及其生涯汇总（由调用方管理事务）
+        players为本次写入涉及的玩家，包括被覆盖或删除的排名原来的玩家
+        """
+        # 受影响的玩家写入临时表，后续语句按player索引逐个玩家计算
+        conn.execute('CREATE TEMP TABLE IF NOT EXISTS affected_players (player TEXT PRIMARY KEY)')
+        conn.execute('DELETE FROM affected_players')
+        conn.executemany('INSERT OR IGNORE INTO affected_players (player) VALUES (?)',
+                         ((player,) for player in players if player is not None))
+        
+        conn.execute('''
+        DELETE FROM player_season_best
+        WHERE mode = ? AND server = ? AND season_num = ? AND player IN (SELECT player FROM affected_players)
+        ''', (mode, server, season_num))
+        conn.execute('''
+        INSERT INTO player_season_best (player, mode, server, season_num, best_rank, best_score)
+        SELECT player, mode, server, season_num, MIN(rank), MAX(score)
         FROM simplified_rank_data
-        '''
+        WHERE season_num = ? AND mode = ? AND server = ? AND player IN (SELECT player FROM affected_players)
+        GROUP BY player
+        ''', (season_num, mode, server))
         
-        import pandas as pd
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        conn.execute('''
+        DELETE FROM player_career
+        WHERE mode = ? AND server = ? AND player IN (SELECT player FROM affected_players)
+        ''', (mode, server))
+        conn.execute('''
+        INSERT INTO player_career (player, mode, server, seasons_played, best_rank, best_score, last_season)
+        SELECT player, mode, server, COUNT(*), MIN(best_rank), MAX(best_score), MAX(season_num)
+        FROM player_season_best
+        WHERE mode = ? AND server = ? AND player IN (SELECT player FROM affected_players)
+        GROUP BY player
+        ''', (mode, server))
+    
+    def build_player_match_query(self, query):
+        """
+        构建按子串匹配玩家的子查询，返回(SQL, 参数)，结果列为player
+        """
+        # 包含#时按完整战网ID匹配
+        if '#' in query:
+            return 'SELECT player FROM player_index WHERE player LIKE ?', (f'%{query}%',)
+        
+        # 三元组索引要求至少3个字符
+        if self.fts_enabled and len(query) >= 3:
+            phrase = '"' + query.replace('"', '""') + '"'
+            return ('''
+            SELECT p.player FROM player_fts
+            JOIN player_index p ON p.id = player_fts.rowid
+            WHERE player_fts MATCH ?
+            ''', (phrase,))
         
-        return df
+        return 'SELECT player FROM player_index WHERE name LIKE ?', (f'%{query}%',)
     
-    def check_season_exists(self, season):
-        # 检查指定赛季的数据是否已存在
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def search_players(self, query, limit=20):
+        """
+        按相关度搜索玩家，返回战网ID列表
+        排序依次为：名字完全匹配、前缀匹配、子串匹配、近似匹配（忽略#数字后缀）
+        """
+        query = query.strip()
+        name = strip_battle_tag_suffix(query).lower()
+        if not query:
+            return []
+        
+        conn = self.get_connection()
+        match_sql, params = self.build_player_match_query(query)
         
-        cursor.execute('''
-        SELECT COUNT(*) FROM simplified_rank_data WHERE season = ?
-        ''', (season,))
+        # 子串匹配，按匹配程度和名字长度排序
+        rows = conn.execute(f'''
+        SELECT player, name FROM player_index
+        WHERE player IN ({match_sql})
+        ORDER BY CASE WHEN lower(name) = ? THEN 0
+                      WHEN lower(name) LIKE ? THEN 1
+                      ELSE 2 END,
+                 length(name), player
+        LIMIT ?
+        ''', params + (name, f'{name}%', limit)).fetchall()
         
-        count = cursor.fetchone()[0]
-        conn.close()
+        players = [row[0] for row in rows]
+        
+        # 没有子串匹配时用三元组OR查询做近似匹配（容忍拼写差异）
+        if not players and self.fts_enabled and len(name) >= 3:
+            trigrams = {name[i:i + 3] for i in range(len(name) - 2)}
+            fuzzy_query = ' OR '.join('"' + gram.replace('"', '""') + '"' for gram in trigrams)
+            candidates = conn.execute('''
+            SELECT p.player, p.name FROM player_fts
+            JOIN player_index p ON p.id = player_fts.rowid
+            WHERE player_fts MATCH ?
+            ORDER BY bm25(player_fts)
+            LIMIT ?
+            ''', (fuzzy_query, limit * 5)).fetchall()
+            
+            candidates.sort(key=lambda row: -SequenceMatcher(None, name, row[1].lower()).ratio())
+            players = [row[0] for row in candidates[:limit]]
         
-        return count > 0
+        return players
     
-    def get_player_data(self, player_name):
+    def save_data(self, data, season, mode, server, rank_range=None):
         """
-        根据玩家名字模糊搜索玩家数据
+        增量保存赛季数据：只写入有变化的排名，只删除已不存在的排名
+        rank_range为(start, end)时data只代表该排名区间，区间外的已有数据保持不变
+        返回变更统计 {'inserted', 'updated', 'deleted', 'unchanged'}
         """
-        conn = sqlite3.connect(self.db_path)
-        query = '''
-        SELECT season, player, score, rank
-        FROM simplified_rank_data
-        WHERE player LIKE ?
-        ORDER BY season, score DESC
-        '''
-        
-        import pandas as pd
-        df = pd.read_sql_query(query, conn, params=(f'%{player_name}%',))
-        conn.close()
-        
-        # 处理赛季名称，将数字格式和文本格式的赛季合并
-        if not df.empty:
-            # 创建赛季映射，将文本格式的赛季转换为数字格式
-            season_map = {}
-            for season in df['season'].unique():
-                if isinstance(season, str) and season.startswith('第') and season.endswith('赛季'):
-                    # 提取数字部分
-                    try:
-                        season_num = season.replace('第', '').replace('赛季', '')
-                        season_map[season] = season_num
-                    except:
-                        pass
+        with metrics.timer('db.save_data'):
+            summary = self.save_data_diff(data, season, mode, server, rank_range)
+        metrics.incr('db.rows_written', summary['inserted'] + summary['updated'] + summary['deleted'])
+        return summary
+    
+    def save_merged_data(self, rows, season, mode):
+        """
+        保存跨服务器合并的排行榜：rows为(全局排名, 玩家, 积分, 服务器, 服务器排名)
+        按服务器分别保存，每个服务器只更新本次合并覆盖的服务器排名区间
+        """
+        by_server = {}
+        for global_rank, player, score, server, rank in rows:
+            by_server.setdefault(server, []).append((rank, player, score))
+        
+        summaries = {}
+        for server, data in by_server.items():
+            ranks = [row[0] for row in data]
+            summaries[server] = self.save_data(data, season, mode, server, (min(ranks), max(ranks)))
+        return summaries
+    
+    def save_data_diff(self, data, season, mode, server, rank_range=None):
+        """
+        计算与数据库中现有数据的差异并写入，返回变更统计
+        """
+        conn = self.get_connection()
+        season_num = parse_season_number(season)
+        
+        # 读取该赛季现有数据（指定排名区间时只比较区间内的排名）
+        start, end = rank_range if rank_range else (1, -1)
+        existing = {}
+        for rank, player, score in conn.execute('''
+        SELECT rank, player, score FROM simplified_rank_data
+        WHERE season_num = ? AND mode = ? AND server = ? AND rank IS NOT NULL
+          AND rank >= ? AND (? < 0 OR rank <= ?)
+        ''', (season_num, mode, server, start, end, end)):
+            existing[rank] = (player, score)
+        
+        # 计算差异
+        incoming = {row[0]: (row[1], row[2]) for row in data}
+        changed = [(rank, player, score) for rank, (player, score) in incoming.items()
+                   if existing.get(rank) != (player, score)]
+        removed = [(season_num, mode, server, rank) for rank in existing if rank not in incoming]
+        inserted = sum(1 for row in changed if row[0] not in existing)
+        
+        # 本次写入涉及的玩家：新写入的玩家以及被覆盖、删除的排名原来的玩家
+        affected_players = {row[1] for row in changed}
+        affected_players.update(existing[row[0]][0] for row in changed if row[0] in existing)
+        affected_players.update(existing[row[3]][0] for row in removed)
+        
+        with conn:
+            # 没有排名的旧数据涉及的玩家同样需要更新生涯汇总
+            affected_players.update(player for (player,) in conn.execute('''
+            SELECT player FROM simplified_rank_data
+            WHERE season_num = ? AND mode = ? AND server = ? AND rank IS NULL
+            ''', (season_num, mode, server)))
+            
+            # 删除消失的排名以及没有排名的旧数据
+            conn.executemany('''
+            DELETE FROM simplified_rank_data
+            WHERE season_num = ? AND mode = ? AND server = ? AND rank = ?
+            ''', removed)
+            deleted_without_rank = conn.execute('''
+            DELETE FROM simplified_rank_data
+            WHERE season_num = ? AND mode = ? AND server = ? AND rank IS NULL
+            ''', (season_num, mode, server)).rowcount
             
-            # 替换赛季名称
-            df['season'] = df['season'].replace(season_map)
+            self.insert_rows(conn, changed, season, mode, server)
             
-            # 去重，保留每个赛季中积分最高的记录
-            df = df.sort_values('score', ascending=False).drop_duplicates(['season', 'player'])
+            if affected_players:
+                self.update_player_career(conn, season_num, affected_players, mode, server)
+        
+        return {
+            'inserted': inserted,
+            'updated': len(changed) - inserted,
+            'deleted': len(removed) + deleted_without_rank,
+            'unchanged': len(incoming) - len(changed)
+        }
+    
+    def get_import_checkpoint(self, season, mode=DEFAULT_MODE, server=DEFAULT_SERVER):
+        """
+        获取赛季导入的检查点，返回(已提交的最后一页, 总页数, 是否已完成)，没有检查点时返回None
+        """
+        conn = self.get_connection()
+        row = conn.execute('''
+        SELECT last_page, total_pages, completed FROM import_checkpoints
+        WHERE season_num = ? AND mode = ? AND server = ?
+        ''', (parse_season_number(season), mode, server)).fetchone()
+        
+        if row is None:
+            return None
+        return row[0], row[1], bool(row[2])
+    
+    def save_import_chunk(self, data, season, last_page, total_pages, mode=DEFAULT_MODE, server=DEFAULT_SERVER):
+        """
+        在一个事务中写入一块导入数据并把检查点推进到last_page，data为空时只记录检查点
+        """
+        conn = self.get_connection()
+        season_num = parse_season_number(season)
+        
+        with metrics.timer('db.import_chunk'), conn:
+            if data:
+                # 续传时可能覆盖上次未提交前已写入的排名，原来的玩家也需要更新生涯汇总
+                ranks = [row[0] for row in data]
+                affected_players = {player for (player,) in conn.execute('''
+                SELECT player FROM simplified_rank_data
+                WHERE season_num = ? AND mode = ? AND server = ? AND rank BETWEEN ? AND ?
+                ''', (season_num, mode, server, min(ranks), max(ranks)))}
+                affected_players.update(row[1] for row in data)
+                
+                self.insert_rows(conn, data, season, mode, server)
+                self.update_player_career(conn, season_num, affected_players, mode, server)
             
-            # 重新排序
-            df = df.sort_values(['season', 'score'], ascending=[True, False])
+            conn.execute('''
+            INSERT INTO import_checkpoints (season_num, mode, server, last_page, total_pages, completed)
+            VALUES (?, ?, ?, ?, ?, 0)
+            ON CONFLICT (season_num, mode, server) DO UPDATE SET
+                last_page = excluded.last_page,
+                total_pages = excluded.total_pages,
+                updated_at = CURRENT_TIMESTAMP
+            ''', (season_num, mode, server, last_page, total_pages))
+        
+        metrics.incr('db.rows_written', len(data))
+    
+    def complete_import(self, season, mode=DEFAULT_MODE, server=DEFAULT_SERVER):
+        """
+        将赛季导入标记为已完成
+        """
+        conn = self.get_connection()
+        with conn:
+            conn.execute('''
+            UPDATE import_checkpoints SET completed = 1, updated_at = CURRENT_TIMESTAMP
+            WHERE season_num = ? AND mode = ? AND server = ?
+            ''', (parse_season_number(season), mode, server))
+    
+    def insert_rows(self, conn, data, season, mode=DEFAULT_MODE, server=DEFAULT_SERVER):
+        """
+        使用executemany批量写入数据行，同一赛季、模式、服务器的同一排名已存在时覆盖（由调用方管理事务）
+        """
+        season_num = parse_season_number(season)
+        
+        # 存储赛季、模式、服务器、玩家、积分和排名数据
+        conn.executemany('''
+        INSERT INTO simplified_rank_data (season, season_num, mode, server, player, score, rank)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (season_num, mode, server, rank) DO UPDATE SET
+            season = excluded.season,
+            player = excluded.player,
+            score = excluded.score,
+            timestamp = CURRENT_TIMESTAMP
+        ''', ((season, season_num, mode, server, row[1], row[2], row[0]) for row in data))
+    
+    def check_season_exists(self, season):
+        # 检查指定赛季的数据是否已完整导入（以导入检查点为准）
+        # 没有检查点的赛季可能只保存了查询过的排名，由导入时与排行榜总人数核对
+        checkpoint = self.get_import_checkpoint(season)
+        return checkpoint is not None and checkpoint[2]
+    
+    def count_season_ranks(self, season, max_rank, mode=DEFAULT_MODE, server=DEFAULT_SERVER):
+        """
+        统计赛季中排名在1到max_rank之间的行数（每个排名最多一行）
+        """
+        conn = self.get_connection()
+        return conn.execute('''
+        SELECT COUNT(*) FROM simplified_rank_data
+        WHERE season_num = ? AND mode = ? AND server = ? AND rank BETWEEN 1 AND ?
+        ''', (parse_season_number(season), mode, server, max_rank)).fetchone()[0]
+    
+    def get_season_data(self, season, limit=500, mode=None, server=None, start_rank=None, end_rank=None):
+        """
+        按积分从高到低获取指定赛季的数据，返回[rank, player, score]列表
+        mode或server为None时不按该条件过滤，指定start_rank和end_rank时只返回该排名区间，limit为None时不限制行数
+        """
+        # 只拼接需要的过滤条件，使排名区间查询可以走唯一索引(season_num, mode, server, rank)
+        conditions = ['season_num = ?']
+        params = [parse_season_number(season)]
+        for column, value in (('mode', mode), ('server', server)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        if start_rank is not None and end_rank is not None:
+            conditions.append('rank BETWEEN ? AND ?')
+            params.extend((start_rank, end_rank))
+        params.append(-1 if limit is None else limit)
+        
+        cursor = self.get_connection().execute(f'''
+        SELECT rank, player, score
+        FROM simplified_rank_data
+        WHERE {' AND '.join(conditions)}
+        ORDER BY score DESC
+        LIMIT ?
+        ''', params)
+        
+        return cursor.fetchall()
+    
+    def iter_export_rows(self, season=None, mode=None, server=None, chunk_size=5000):
+        """
+        按块读取导出数据，每次产出最多chunk_size行(season, mode, server, rank, player, score)
+        season、mode或server为None时不按该条件过滤
+        """
+        # 只拼接需要的过滤条件，使查询可以按唯一索引(season_num, mode, server, rank)顺序扫描
+        conditions = []
+        params = []
+        for column, value in (('season_num', parse_season_number(season) if season is not None else None),
+                              ('mode', mode), ('server', server)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        # 使用独立游标分块读取，内存占用与总行数无关
+        cursor = self.get_connection().execute(f'''
+        SELECT season_num, mode, server, rank, player, score
+        FROM simplified_rank_data
+        {where}
+        ORDER BY season_num, mode, server, rank
+        ''', params)
+        
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+    
+    def get_player_data(self, player_name, mode=None, server=None):
+        """
+        根据玩家名字模糊搜索玩家数据，返回每个玩家在每个模式、服务器每个赛季的最好成绩
+        [season, mode, server, player, score, rank]列表，mode或server为None时不按该条件过滤
+        """
+        # 通过玩家名字索引定位匹配的玩家，再按主键读取预先汇总的赛季最好成绩
+        match_sql, params = self.build_player_match_query(player_name.strip())
+        cursor = self.get_connection().execute(f'''
+        SELECT season_num, mode, server, player, best_score, best_rank
+        FROM player_season_best
+        WHERE player IN ({match_sql}) AND (? IS NULL OR mode = ?) AND (? IS NULL OR server = ?)
+        ORDER BY season_num, mode, server, best_score DESC
+        ''', (*params, mode, mode, server, server))
+        
+        return cursor.fetchall()
+    
+    def get_player_career(self, player_name, mode=None, server=None):
+        """
+        根据玩家名字模糊搜索玩家生涯汇总，返回
+        [player, mode, server, seasons_played, best_rank, best_score, last_season]列表，mode或server为None时不按该条件过滤
+        """
+        match_sql, params = self.build_player_match_query(player_name.strip())
+        cursor = self.get_connection().execute(f'''
+        SELECT player, mode, server, seasons_played, best_rank, best_score, last_season
+        FROM player_career
+        WHERE player IN ({match_sql}) AND (? IS NULL OR mode = ?) AND (? IS NULL OR server = ?)
+        ORDER BY best_score DESC
+        ''', (*params, mode, mode, server, server))
         
-        return df
\ No newline at end of file
+        return cursor.fetchall()
@@ -0,0 +1,24 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+from exporter import DataExporter
+
+class ExportThread(QThread):
+    # 导出完成：(导出行数, 错误信息)，成功时错误信息为空
+    finished = pyqtSignal(int, str)
+    progress = pyqtSignal(int)
+    
+    def __init__(self, db_manager, filename, season, mode, server):
+        super().__init__()
+        self.filename = filename
+        self.season = season
+        self.mode = mode
+        self.server = server
+        self.exporter = DataExporter(db_manager)
+    
+    def run(self):
+        try:
+            count = self.exporter.export(self.filename, self.season, self.mode, self.server,
+                                         progress_callback=self.progress.emit)
+            self.finished.emit(count, '')
+        except Exception as e:
+            print(f"导出出错: {e}")
+            self.finished.emit(0, str(e))
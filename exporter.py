@@ -0,0 +1,107 @@
+import csv
+import os
+
+# 数据导出模块：从数据库分块读取并流式写入文件，内存占用与数据总量无关
+
+# 导出文件的列名，与DatabaseManager.iter_export_rows的列顺序一致
+EXPORT_COLUMNS = ['赛季', '模式', '服务器', '排名', '玩家', '积分']
+
+# 支持的导出格式（按文件扩展名）
+EXPORT_FORMATS = ('csv', 'parquet', 'xlsx')
+
+
+class DataExporter:
+    """
+    排行榜数据导出器，支持CSV、Parquet和只写模式的XLSX
+    """
+    def __init__(self, db_manager, chunk_size=5000):
+        self.db_manager = db_manager
+        self.chunk_size = chunk_size
+    
+    def get_format(self, filename):
+        """
+        根据文件扩展名确定导出格式
+        """
+        file_format = os.path.splitext(filename)[1].lstrip('.').lower()
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError(f'不支持的导出格式: {file_format}')
+        return file_format
+    
+    def export(self, filename, season=None, mode=None, server=None, progress_callback=None):
+        """
+        按赛季、模式和服务器过滤并导出数据，返回导出的行数
+        progress_callback(已导出行数)在每写完一块数据后调用
+        """
+        file_format = self.get_format(filename)
+        chunks = self.db_manager.iter_export_rows(season, mode, server, self.chunk_size)
+        writer = getattr(self, f'write_{file_format}')
+        
+        return writer(filename, self.count_rows(chunks, progress_callback))
+    
+    def count_rows(self, chunks, progress_callback):
+        """
+        在数据块流经时统计行数并报告进度
+        """
+        self.exported_rows = 0
+        for rows in chunks:
+            yield rows
+            self.exported_rows += len(rows)
+            if progress_callback:
+                progress_callback(self.exported_rows)
+    
+    def write_csv(self, filename, chunks):
+        """
+        写入CSV文件（带BOM，便于Excel直接打开）
+        """
+        with open(filename, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_COLUMNS)
+            for rows in chunks:
+                writer.writerows(rows)
+        
+        return self.exported_rows
+    
+    def write_parquet(self, filename, chunks):
+        """
+        写入Parquet文件，每块数据作为一个行组
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError('导出Parquet格式需要安装pyarrow: pip install pyarrow')
+        
+        schema = pa.schema([
+            (EXPORT_COLUMNS[0], pa.int64()),
+            (EXPORT_COLUMNS[1], pa.string()),
+            (EXPORT_COLUMNS[2], pa.string()),
+            (EXPORT_COLUMNS[3], pa.int64()),
+            (EXPORT_COLUMNS[4], pa.string()),
+            (EXPORT_COLUMNS[5], pa.int64()),
+        ])
+        
+        with pq.ParquetWriter(filename, schema) as writer:
+            for rows in chunks:
+                columns = [list(column) for column in zip(*rows)]
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+        
+        return self.exported_rows
+    
+    def write_xlsx(self, filename, chunks):
+        """
+        以openpyxl只写模式写入XLSX文件，行数据直接写入磁盘不在内存中保留
+        """
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise ImportError('导出Excel格式需要安装openpyxl: pip install openpyxl')
+        
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(EXPORT_COLUMNS)
+        for rows in chunks:
+            for row in rows:
+                sheet.append(row)
+        workbook.save(filename)
+        
+        return self.exported_rows
@@ -0,0 +1,148 @@
+import random
+import threading
+import time
+from metrics import metrics
+from rate_limiter import TokenBucket, AdaptiveConcurrencyLimiter
+
+# HTTP传输模块：所有排行榜请求共用一个带连接池和重试的会话
+
+# 需要重试的HTTP状态码（限流和服务端错误）
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class HttpClient:
+    """
+    共享的HTTP客户端，复用连接并对临时性错误进行指数退避重试
+    所有请求经过同一个令牌桶限流器和自适应并发控制器
+    """
+    def __init__(self, pool_size=16, timeout=10, max_retries=3, backoff_base=0.5, backoff_max=8.0,
+                 rate_limiter=None, concurrency_limiter=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # 默认不限速、不限制并发
+        self.rate_limiter = rate_limiter or TokenBucket(0, 1)
+        self.concurrency_limiter = concurrency_limiter or AdaptiveConcurrencyLimiter(
+            initial=pool_size, min_limit=pool_size, max_limit=pool_size)
+        
+        # requests在首次创建客户端时才导入，加快程序启动
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        # 创建带连接池的会话（重试由本类自行处理）
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+    
+    def get_backoff_delay(self, attempt, retry_after=None):
+        """
+        计算第attempt次重试前的等待时间（指数退避+随机抖动）
+        """
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        
+        delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+        # 全抖动，避免多个线程同时重试
+        return random.uniform(0, delay)
+    
+    def get(self, url, params=None, headers=None):
+        """
+        发送GET请求，失败时按退避策略重试，重试耗尽后抛出异常
+        """
+        import requests
+        
+        attempt = 0
+        
+        while True:
+            retry_after = None
+            
+            # 限流：先取令牌，再占用并发名额
+            self.rate_limiter.acquire()
+            self.concurrency_limiter.acquire()
+            start = time.perf_counter()
+            throttled = True
+            try:
+                metrics.incr('http.requests')
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+                metrics.incr('http.bytes_received', len(response.content))
+                throttled = response.status_code in RETRY_STATUS_CODES
+            except (requests.ConnectionError, requests.Timeout) as e:
+                response = None
+                error = e
+            finally:
+                latency = time.perf_counter() - start
+                metrics.record('http.request', latency)
+                # 限流、服务端错误和网络错误都会降低并发上限
+                self.concurrency_limiter.release(None if throttled else latency, throttled)
+            
+            if response is not None:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()  # 检查请求是否成功
+                    return response
+                
+                # 可重试的状态码
+                metrics.incr('http.throttled')
+                retry_after = self.parse_retry_after(response)
+                error = requests.HTTPError(f'HTTP {response.status_code}', response=response)
+            
+            if attempt >= self.max_retries:
+                raise error
+            
+            metrics.incr('http.retries')
+            time.sleep(self.get_backoff_delay(attempt, retry_after))
+            attempt += 1
+    
+    def get_json(self, url, params=None):
+        """
+        发送GET请求并解析JSON响应
+        """
+        response = self.get(url, params=params)
+        with metrics.timer('parse.json'):
+            return response.json()
+    
+    def parse_retry_after(self, response):
+        """
+        解析Retry-After响应头（秒数格式）
+        """
+        value = response.headers.get('Retry-After')
+        try:
+            return max(0.0, float(value)) if value is not None else None
+        except ValueError:
+            return None
+    
+    def close(self):
+        """
+        关闭会话，释放连接池
+        """
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """
+    获取全局共享的HTTP客户端
+    """
+    global _client
+    
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from config import ConfigManager
+                config_manager = ConfigManager()
+                max_concurrency = config_manager.get_max_concurrent_requests()
+                _client = HttpClient(
+                    pool_size=max_concurrency * 2,
+                    timeout=config_manager.get_request_timeout(),
+                    max_retries=config_manager.get_max_retries(),
+                    rate_limiter=TokenBucket(config_manager.get_rate_limit(), config_manager.get_rate_burst()),
+                    # 所有获取线程共用并发上限，从一半开始按服务器反馈调整
+                    concurrency_limiter=AdaptiveConcurrencyLimiter(
+                        initial=max(1, max_concurrency // 2), min_limit=1, max_limit=max_concurrency)
+                )
+    
+    return _client
@@ -1,95 +1,114 @@
-import requests
-import sqlite3
+from config import ConfigManager
+from database import DatabaseManager
+from leaderboard import Leaderboard
+from metrics import metrics
+from page_fetcher import PageFetcher, PAGE_SIZE
 
 # 历史赛季数据导入脚本
-def import_season_data(season, season_id):
+def import_season_data(season, season_id, db_manager=None, page_fetcher=None, on_progress=None, cancel_token=None):
     """
     导入指定赛季的数据
+    page_fetcher可由调用方共享（多个赛季同时导入时共用请求预算），on_progress(已提交页数, 总页数)报告导入进度
+    cancel_token被取消后在当前块结束时停止，已提交的分页保留在检查点中
     """
-    # 连接数据库
-    conn = sqlite3.connect('hs_rank.db')
-    cursor = conn.cursor()
+    # 数据库管理器（复用调用方的连接）
+    if db_manager is None:
+        db_manager = DatabaseManager()
     
     # 检查该赛季的数据是否已存在
-    cursor.execute('''
-    SELECT COUNT(*) FROM simplified_rank_data WHERE season = ?
-    ''', (season,))
-    
-    count = cursor.fetchone()[0]
-    if count > 0:
+    if db_manager.check_season_exists(season):
         print(f'{season} 数据已存在，跳过导入')
-        conn.close()
         return False
     
-    # API地址
-    api_url = "https://webapi.blizzard.cn/hs-rank-api-server/api/game/ranks"
+    token = metrics.begin('import', season=season, season_id=season_id)
+    with metrics.profile('import'):
+        imported = fetch_and_save_season(season, season_id, db_manager, page_fetcher, on_progress, cancel_token)
+    metrics.end(token, success=imported)
     
-    # 初始化数据列表
-    all_data = []
+    return imported
+
+def fetch_and_save_season(season, season_id, db_manager, page_fetcher=None, on_progress=None, cancel_token=None):
+    """
+    分块获取赛季数据并写入数据库，成功时返回True
+    每chunk_pages页在一个事务中提交并记录检查点，中断后再次导入时从最后提交的分页之后继续
+    """
+    config_manager = ConfigManager()
+    if page_fetcher is None:
+        # 分页获取器（共享HTTP客户端，并发数受配置限制）
+        page_fetcher = PageFetcher(config_manager.get_api_base_url(), config_manager.get_max_concurrent_requests())
+    page_size = PAGE_SIZE
+    chunk_pages = config_manager.get_import_chunk_pages()
+    mode_name = 'undergroundarena'
     
-    # 分页获取数据
-    page = 1
-    page_size = 25
+    # 上次中断的导入从检查点继续，已提交的分页和总页数无需重新获取
+    checkpoint = db_manager.get_import_checkpoint(season)
+    last_committed, total_pages = (checkpoint[0], checkpoint[1]) if checkpoint else (0, None)
+    if last_committed:
+        print(f'{season} 从第 {last_committed + 1} 页继续导入（共 {total_pages} 页）')
     
-    while True:
-        try:
-            # 构建API请求参数
-            params = {
-                'page': page,
-                'page_size': page_size,
-                'mode_name': 'undergroundarena',
-                'season_id': season_id
-            }
+    # 确定总页数时探测到的分页在写入时复用
+    probed = {}
+    
+    try:
+        if total_pages is None:
+            with metrics.timer('import.fetch'):
+                total_pages = page_fetcher.find_last_page(mode_name, season_id, page_size, probed)
             
-            # 发送API请求
-            response = requests.get(api_url, params=params)
-            response.raise_for_status()
+            # 排行榜为空（赛季尚未公布或响应暂时为空）时不记录检查点，下次导入时重新检查
+            if not total_pages:
+                print(f'{season} 排行榜暂无数据，没有需要导入的数据')
+                return False
             
-            # 解析响应数据
-            data = response.json()
+            # 检查点之前已完整导入的赛季：排名数与排行榜总人数一致时直接标记为已完成
+            total_rows = (total_pages - 1) * page_size + len(page_fetcher.get_page_items(probed[total_pages]))
+            if db_manager.count_season_ranks(season, total_rows) == total_rows:
+                db_manager.save_import_chunk([], season, total_pages, total_pages)
+                db_manager.complete_import(season)
+                print(f'{season} 数据已完整存在（共 {total_rows} 条），无需重新导入')
+                return False
             
-            if data.get('code') == 0:
-                items = data.get('data', {}).get('list', [])
-                
-                if not items:
-                    break  # 没有更多数据
-                
-                # 处理数据
-                for item in items:
-                    rank = item.get('position')
-                    player = item.get('battle_tag')
-                    score = item.get('score')
-                    
-                    # 添加到数据列表
-                    all_data.append([rank, player, '', score, score])  # 职业留空
-                
-                # 下一页
-                page += 1
-            else:
-                break
-                
-        except Exception as e:
-            print(f'API调用失败: {e}')
-            break
-    
-    # 保存数据到数据库
-    print(f'保存 {season} 数据，共 {len(all_data)} 条...')
-    
-    for row in all_data:
-            try:
-                # 存储赛季、玩家、积分和排名数据
-                cursor.execute('''
-                INSERT INTO simplified_rank_data (season, player, score, rank)
-                VALUES (?, ?, ?, ?)
-                ''', (season, row[1], row[3], row[0]))
-            except Exception as e:
-                print(f'存储失败: {e}')
-                # 忽略重复数据
-                pass
-    
-    # 提交更改
-    conn.commit()
-    conn.close()
+            db_manager.save_import_chunk([], season, 0, total_pages)
+        
+        if on_progress is not None:
+            on_progress(last_committed, total_pages)
+        
+        for first_page in range(last_committed + 1, total_pages + 1, chunk_pages):
+            pages = range(first_page, min(first_page + chunk_pages, total_pages + 1))
+            
+            # 并发获取本块的分页，任一分页失败时放弃本块，已提交的分页保留
+            with metrics.timer('import.fetch'):
+                responses = {page: probed.pop(page) for page in pages if page in probed}
+                missing_pages = [page for page in pages if page not in responses]
+                responses.update(page_fetcher.iter_pages(mode_name, season_id, missing_pages, page_size,
+                                                         cancel_token))
+            
+            # 取消时放弃未完成的块，下次导入时从检查点继续
+            if cancel_token is not None and cancel_token.cancelled:
+                print(f'{season} 导入已停止，已保存到第 {last_committed} 页')
+                return False
+            
+            # 按页码顺序处理数据
+            with metrics.timer('import.parse'):
+                chunk = Leaderboard()
+                for page in pages:
+                    data = responses[page]
+                    if data.get('code') != 0:
+                        raise ValueError(f'第 {page} 页返回错误: {data.get("message")}')
+                    for item in page_fetcher.get_page_items(data):
+                        chunk.append(item.get('position'), item.get('battle_tag'), item.get('score'))
+            
+            # 写入本块并推进检查点
+            db_manager.save_import_chunk(chunk, season, pages[-1], total_pages)
+            last_committed = pages[-1]
+            
+            if on_progress is not None:
+                on_progress(last_committed, total_pages)
+        
+        db_manager.complete_import(season)
+    except Exception as e:
+        # 重试耗尽或存储失败时停止导入，下次导入时从检查点继续
+        print(f'{season} 导入中断: {e}，已保存到第 {last_committed} 页')
+        return False
     
     print(f'{season} 数据导入完成！')
     return True
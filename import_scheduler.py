@@ -0,0 +1,107 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import ConfigManager
+from database import DatabaseManager
+from import_history_data import import_season_data
+from page_fetcher import PageFetcher
+from query_executor import CancelToken
+
+# 多赛季导入调度器：缺失的历史赛季同时导入
+#
+# 所有赛季共用一个分页获取器和全局HTTP客户端，总请求数受客户端的限速和自适应并发上限约束（全局请求预算），
+# 同时导入的赛季数受 import_parallel_seasons 限制。每个赛季在各自的事务中写入，一个赛季失败不影响其他赛季。
+# 停止调度器时正在导入的赛季在当前块结束后停止，已提交的分页由检查点保留。
+
+# 赛季导入状态
+STATUS_PENDING = 'pending'
+STATUS_CHECKING = 'checking'
+STATUS_FETCHING = 'fetching'
+STATUS_DONE = 'done'
+STATUS_SKIPPED = 'skipped'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+
+
+class ImportScheduler:
+    """
+    在后台线程池中同时导入多个赛季，通过on_progress(赛季号, 状态, 已获取页数, 总页数)报告各赛季进度
+    on_progress在导入线程中调用
+    """
+    def __init__(self, db_manager=None, max_parallel_seasons=None, on_progress=None):
+        config_manager = ConfigManager()
+        self.db_manager = db_manager or DatabaseManager()
+        # 共享的分页获取器，各赛季的请求共用同一个HTTP客户端
+        self.page_fetcher = PageFetcher(config_manager.get_api_base_url(),
+                                        config_manager.get_max_concurrent_requests())
+        max_parallel_seasons = max_parallel_seasons or config_manager.get_import_parallel_seasons()
+        self.pool = ThreadPoolExecutor(max_workers=max_parallel_seasons, thread_name_prefix='import')
+        self.on_progress = on_progress
+        # 导入中的赛季 {赛季号: Future}，重复提交的赛季复用同一个任务
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        # 停止时取消所有正在导入的赛季
+        self.cancel_token = CancelToken()
+    
+    def submit(self, seasons):
+        """
+        提交需要导入的赛季号，返回 {赛季号: Future}，Future的结果为是否导入了新数据
+        """
+        futures = {}
+        with self.lock:
+            for season_num in seasons:
+                future = self.in_flight.get(season_num)
+                if future is None:
+                    self.report(season_num, STATUS_PENDING)
+                    future = self.pool.submit(self.import_one, season_num)
+                    self.in_flight[season_num] = future
+                    future.add_done_callback(lambda done, season_num=season_num: self.forget(season_num, done))
+                futures[season_num] = future
+        return futures
+    
+    def forget(self, season_num, future):
+        with self.lock:
+            if self.in_flight.get(season_num) is future:
+                del self.in_flight[season_num]
+    
+    def import_one(self, season_num):
+        """
+        导入单个赛季（在导入线程中运行）
+        """
+        season_name = f'第{season_num}赛季'
+        try:
+            self.report(season_num, STATUS_CHECKING)
+            if self.db_manager.check_season_exists(season_name):
+                self.report(season_num, STATUS_SKIPPED)
+                return False
+            
+            def on_progress(completed, total):
+                self.report(season_num, STATUS_FETCHING, completed, total)
+            
+            imported = import_season_data(season_name, season_num, self.db_manager, self.page_fetcher, on_progress,
+                                          self.cancel_token)
+        except Exception as e:
+            print(f'{season_name} 导入失败: {e}')
+            imported = False
+        
+        if self.cancel_token.cancelled and not imported:
+            self.report(season_num, STATUS_CANCELLED)
+        elif not imported and self.db_manager.check_season_exists(season_name):
+            # 已有的数据经核对是完整的赛季
+            self.report(season_num, STATUS_SKIPPED)
+        else:
+            self.report(season_num, STATUS_DONE if imported else STATUS_FAILED)
+        return imported
+    
+    def report(self, season_num, status, completed=0, total=0):
+        if self.on_progress is not None:
+            try:
+                self.on_progress(season_num, status, completed, total)
+            except Exception as e:
+                print(f'导入进度回调失败: {e}')
+    
+    def shutdown(self, wait=False):
+        """
+        停止调度器：尚未开始的赛季不再导入，正在导入的赛季在当前块结束后停止
+        """
+        self.cancel_token.cancel()
+        self.pool.shutdown(wait=wait, cancel_futures=True)
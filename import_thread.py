@@ -0,0 +1,57 @@
+import threading
+from PyQt5.QtCore import QObject, pyqtSignal
+from import_scheduler import ImportScheduler, STATUS_DONE, STATUS_FAILED
+
+class ImportWorker(QObject):
+    """
+    界面的历史赛季导入任务：在导入调度器中后台运行，通过信号把各赛季的进度送回界面线程
+    """
+    # 赛季进度：(赛季号, 状态, 已获取页数, 总页数)
+    season_progress = pyqtSignal(int, str, int, int)
+    # 本批赛季全部结束：(新导入的赛季数, 失败的赛季数)
+    finished = pyqtSignal(int, int)
+    
+    def __init__(self, db_manager=None):
+        super().__init__()
+        self.scheduler = ImportScheduler(db_manager, on_progress=self.on_progress)
+        # 本批尚未结束的赛季和各赛季的最新状态
+        self.pending = set()
+        self.statuses = {}
+        self.lock = threading.Lock()
+    
+    def start(self, seasons):
+        """
+        提交需要导入的赛季，导入进行中时再次提交的赛季并入当前批次
+        """
+        futures = self.scheduler.submit(seasons)
+        with self.lock:
+            self.pending.update(futures)
+        for season_num, future in futures.items():
+            future.add_done_callback(lambda done, season_num=season_num: self.on_done(season_num))
+    
+    def is_running(self):
+        with self.lock:
+            return bool(self.pending)
+    
+    def stop(self):
+        """
+        停止导入：尚未开始的赛季不再导入，正在导入的赛季在当前块结束后停止
+        """
+        self.scheduler.shutdown(wait=False)
+    
+    def on_progress(self, season_num, status, completed, total):
+        # 在导入线程中调用，信号以队列方式送到界面线程
+        with self.lock:
+            self.statuses[season_num] = status
+        self.season_progress.emit(season_num, status, completed, total)
+    
+    def on_done(self, season_num):
+        with self.lock:
+            self.pending.discard(season_num)
+            if self.pending:
+                return
+            statuses, self.statuses = self.statuses, {}
+        
+        imported = sum(1 for status in statuses.values() if status == STATUS_DONE)
+        failed = sum(1 for status in statuses.values() if status == STATUS_FAILED)
+        self.finished.emit(imported, failed)
@@ -0,0 +1,140 @@
+from array import array
+
+# 排行榜数据容器模块：按列存储排名、玩家和积分
+
+
+class PlayerTable:
+    """
+    玩家名字驻留表，相同名字只保存一份
+    """
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+    
+    def intern(self, name):
+        """
+        返回名字在表中的下标，不存在时添加
+        """
+        player_id = self.ids.get(name)
+        if player_id is None:
+            player_id = len(self.names)
+            self.names.append(name)
+            self.ids[name] = player_id
+        return player_id
+
+
+class Leaderboard:
+    """
+    列式存储的排行榜
+    排名和积分保存在整数数组中，玩家名字保存在驻留字符串表中，每行只保存字符串表的下标
+    迭代和下标访问返回(rank, player, score)元组，与原来的[rank, player, score]行格式兼容
+    """
+    def __init__(self, rows=None, player_table=None):
+        self.ranks = array('q')
+        self.scores = array('q')
+        self.player_ids = array('l')
+        # 字符串表可在切片之间共享
+        self.player_table = player_table if player_table is not None else PlayerTable()
+        
+        if rows is not None:
+            self.extend(rows)
+    
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        从(rank, player, score)行序列创建排行榜
+        """
+        return rows if isinstance(rows, cls) else cls(rows)
+    
+    def __len__(self):
+        return len(self.ranks)
+    
+    def __iter__(self):
+        names = self.player_table.names
+        for rank, player_id, score in zip(self.ranks, self.player_ids, self.scores):
+            yield rank, names[player_id], score
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # 切片共享字符串表，只复制数组
+            result = Leaderboard(player_table=self.player_table)
+            result.ranks = self.ranks[index]
+            result.scores = self.scores[index]
+            result.player_ids = self.player_ids[index]
+            return result
+        
+        return self.ranks[index], self.player_table.names[self.player_ids[index]], self.scores[index]
+    
+    def __repr__(self):
+        return f'Leaderboard({len(self)} rows)'
+    
+    def append(self, rank, player, score):
+        """
+        追加一行
+        """
+        self.ranks.append(int(rank or 0))
+        self.player_ids.append(self.player_table.intern(player))
+        self.scores.append(int(score or 0))
+    
+    def insert(self, position, rank, player, score):
+        """
+        在指定位置插入一行
+        """
+        self.ranks.insert(position, int(rank or 0))
+        self.player_ids.insert(position, self.player_table.intern(player))
+        self.scores.insert(position, int(score or 0))
+    
+    def insert_rows(self, position, rows):
+        """
+        在指定位置插入多行，rows为(rank, player, score)行序列或另一个排行榜
+        """
+        block = Leaderboard(player_table=self.player_table)
+        block.extend(rows)
+        self.ranks[position:position] = block.ranks
+        self.player_ids[position:position] = block.player_ids
+        self.scores[position:position] = block.scores
+    
+    def extend(self, rows):
+        """
+        追加多行，rows为(rank, player, score)行序列或另一个排行榜
+        """
+        if isinstance(rows, Leaderboard) and rows.player_table is self.player_table:
+            # 共享字符串表时直接拼接数组
+            self.ranks.extend(rows.ranks)
+            self.player_ids.extend(rows.player_ids)
+            self.scores.extend(rows.scores)
+            return
+        
+        for row in rows:
+            self.append(row[0], row[1], row[2])
+    
+    def player(self, index):
+        """
+        获取指定行的玩家名字
+        """
+        return self.player_table.names[self.player_ids[index]]
+    
+    def take(self, order):
+        """
+        按下标序列取出若干行，返回新的排行榜
+        """
+        result = Leaderboard(player_table=self.player_table)
+        result.ranks = array('q', (self.ranks[i] for i in order))
+        result.scores = array('q', (self.scores[i] for i in order))
+        result.player_ids = array('l', (self.player_ids[i] for i in order))
+        return result
+    
+    def sort(self, by='rank', reverse=False):
+        """
+        按排名('rank')或积分('score')原地排序
+        """
+        column = self.scores if by == 'score' else self.ranks
+        order = sorted(range(len(self)), key=column.__getitem__, reverse=reverse)
+        sorted_board = self.take(order)
+        self.ranks, self.scores, self.player_ids = sorted_board.ranks, sorted_board.scores, sorted_board.player_ids
+    
+    def filter_rank(self, start, end):
+        """
+        返回排名在[start, end]范围内的行
+        """
+        return self.take([i for i, rank in enumerate(self.ranks) if start <= rank <= end])
@@ -1,23 +1,80 @@
 import sys
-import pandas as pd
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                             QComboBox, QPushButton, QTableWidget, QTableWidgetItem, 
-                             QLabel, QLineEdit, QMessageBox, QProgressBar, QHeaderView)
-from PyQt5.QtCore import Qt
+                             QComboBox, QPushButton, QTableView, 
+                             QLabel, QLineEdit, QMessageBox, QProgressBar, QHeaderView,
+                             QFileDialog)
+from PyQt5.QtCore import Qt, QSortFilterProxyModel, QTimer
 from PyQt5.QtGui import QFont
-from database import DatabaseManager
-from query_thread import QueryThread
+from database import DatabaseManager, DEFAULT_MODE, DEFAULT_SERVER
+from query_thread import QueryWorker
+from query_executor import get_query_executor
+from export_thread import ExportThread
+from import_thread import ImportWorker
 from config import ConfigManager
-from import_history_data import import_season_data
+from import_scheduler import (STATUS_PENDING, STATUS_CHECKING, STATUS_FETCHING, STATUS_DONE,
+                              STATUS_SKIPPED, STATUS_FAILED, STATUS_CANCELLED)
 from modes import ModeManager
+from table_model import RankTableModel
+from page_fetcher import parse_rank_range
+from regions import ALL_REGIONS, get_regions
+from metrics import metrics
+
+# 历史赛季导入状态的显示文字
+IMPORT_STATUS_TEXT = {
+    STATUS_PENDING: '等待中',
+    STATUS_CHECKING: '检查中',
+    STATUS_DONE: '已完成',
+    STATUS_SKIPPED: '已存在',
+    STATUS_FAILED: '失败',
+    STATUS_CANCELLED: '已停止',
+}
 
 class HsRankQuery(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.db_manager = DatabaseManager()
+        # 数据库结构检查推迟到窗口显示之后
+        self.db_manager = DatabaseManager(auto_init=False)
         self.config_manager = ConfigManager()
         self.mode_manager = ModeManager()
+        # 当前查询，新查询开始时取消
+        self.query_worker = None
+        # 历史赛季导入任务（首次导入时创建）和各赛季的进度文字
+        self.import_worker = None
+        self.import_progress = {}
         self.initUI()
+        
+        # 首次绘制后再执行耗时的初始化
+        self.deferred_init_scheduled = False
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        # 窗口第一次绘制完成后才安排初始化，避免推迟首次显示
+        if not self.deferred_init_scheduled:
+            self.deferred_init_scheduled = True
+            QTimer.singleShot(0, self.deferred_init)
+    
+    def deferred_init(self):
+        """
+        窗口显示后执行的初始化：检查并更新数据库结构，启动后台快照
+        """
+        self.db_manager.init_db()
+        
+        # 定时记录当前赛季排行榜，用于查看排名走势
+        self.snapshot_scheduler = None
+        if self.config_manager.get_snapshot_enabled():
+            from snapshots import SnapshotScheduler, SnapshotStore
+            store = SnapshotStore(self.db_manager, self.config_manager.get_snapshot_keyframe_interval())
+            self.snapshot_scheduler = SnapshotScheduler(store)
+            self.snapshot_scheduler.start()
+    
+    def closeEvent(self, event):
+        # 停止后台快照线程
+        if getattr(self, 'snapshot_scheduler', None):
+            self.snapshot_scheduler.stop(timeout=1)
+        # 未开始的赛季不再导入，正在导入的赛季在当前块结束后停止
+        if self.import_worker is not None:
+            self.import_worker.stop()
+        super().closeEvent(event)
     
     def initUI(self):
         # 加载QSS样式文件
@@ -52,14 +109,16 @@ class HsRankQuery(QMainWindow):
         self.mode_label.setFont(font)
         self.mode_combo = QComboBox()
         self.mode_combo.setFont(font)
-        self.mode_combo.addItems(['地下竞技场'])
+        # 模式列表来自模式插件
+        self.mode_combo.addItems(self.mode_manager.get_mode_names())
         
         # 服务器选择
         self.server_label = QLabel('服务器:')
         self.server_label.setFont(font)
         self.server_combo = QComboBox()
         self.server_combo.setFont(font)
-        self.server_combo.addItems(['国服', '欧服', '美服', '亚服'])
+        # 服务器列表来自配置（只列出已启用的服务器），最后一项合并所有服务器的排名
+        self.server_combo.addItems(list(get_regions(self.config_manager, enabled_only=True)) + [ALL_REGIONS])
         
         # 赛季选择
         self.season_label = QLabel('赛季:')
@@ -70,6 +129,14 @@ class HsRankQuery(QMainWindow):
         # 更新赛季选择下拉框
         self.update_season_combo()
         
+        # 排名范围输入（支持任意区间，如 4000-4100）
+        self.rank_range_label = QLabel('排名:')
+        self.rank_range_label.setFont(font)
+        self.rank_range_input = QLineEdit('1-500')
+        self.rank_range_input.setFont(font)
+        self.rank_range_input.setPlaceholderText('如 1-500 或 4000-4100')
+        self.rank_range_input.returnPressed.connect(self.start_query)
+        
         # 查询按钮
         self.query_btn = QPushButton('查询')
         self.query_btn.setFont(font)
@@ -103,6 +170,11 @@ class HsRankQuery(QMainWindow):
         self.player_query_btn.setFont(font)
         self.player_query_btn.clicked.connect(self.open_player_query_window)
         
+        # 诊断按钮
+        self.diagnostics_btn = QPushButton('诊断')
+        self.diagnostics_btn.setFont(font)
+        self.diagnostics_btn.clicked.connect(self.open_diagnostics_window)
+        
         # 添加到查询布局
         query_layout.addWidget(self.mode_label)
         query_layout.addWidget(self.mode_combo)
@@ -110,6 +182,8 @@ class HsRankQuery(QMainWindow):
         query_layout.addWidget(self.server_combo)
         query_layout.addWidget(self.season_label)
         query_layout.addWidget(self.season_combo)
+        query_layout.addWidget(self.rank_range_label)
+        query_layout.addWidget(self.rank_range_input)
         query_layout.addWidget(self.query_btn)
         query_layout.addWidget(self.export_btn)
         query_layout.addWidget(self.search_label)
@@ -117,122 +191,197 @@ class HsRankQuery(QMainWindow):
         query_layout.addWidget(self.search_btn)
         query_layout.addWidget(self.reset_btn)
         query_layout.addWidget(self.player_query_btn)
+        query_layout.addWidget(self.diagnostics_btn)
         query_layout.addWidget(self.settings_btn)
         
         # 进度条
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
         
-        # 结果表格
-        self.result_table = QTableWidget()
-        self.result_table.setColumnCount(3)
-        self.result_table.setHorizontalHeaderLabels(['排名', '玩家', '积分'])
+        # 后台导入历史赛季时的进度
+        self.import_status_label = QLabel()
+        self.import_status_label.setFont(font)
+        self.import_status_label.setVisible(False)
+        
+        # 结果表格（模型只保存数据，单元格按需渲染）
+        self.result_model = RankTableModel(['排名', '玩家', '积分'])
+        # 搜索时通过代理模型过滤玩家列
+        self.result_proxy = QSortFilterProxyModel()
+        self.result_proxy.setSourceModel(self.result_model)
+        self.result_proxy.setFilterKeyColumn(1)
+        self.result_proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.result_table = QTableView()
+        self.result_table.setModel(self.result_proxy)
         header_font = QFont('Arial', 18, QFont.Bold)
         self.result_table.horizontalHeader().setFont(header_font)
         self.result_table.setAlternatingRowColors(True)
+        # 固定行高，避免逐行测量
+        self.result_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         # 设置列宽自动填充
-        self.result_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
-        self.result_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
-        self.result_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.result_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         
         # 添加到主布局
         main_layout.addLayout(query_layout)
         main_layout.addWidget(self.progress_bar)
+        main_layout.addWidget(self.import_status_label)
         main_layout.addWidget(self.result_table)
     
     def start_query(self):
         # 获取查询参数
         mode = self.mode_combo.currentText()
         server = self.server_combo.currentText()
-        rank_range = '1-500'  # 默认排名范围
+        rank_range = self.rank_range_input.text().strip()
         season = self.season_combo.currentText()
         
+        # 检查排名范围格式
+        try:
+            parse_rank_range(rank_range)
+        except ValueError:
+            QMessageBox.warning(self, '提示', '请输入有效的排名范围，如 1-500 或 4000-4100')
+            return
+        
         # 显示进度条
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         
-        # 创建线程进行查询
-        self.query_thread = QueryThread(mode, server, '全部', rank_range, season)
-        self.query_thread.finished.connect(self.handle_query_result)
-        self.query_thread.progress.connect(self.update_progress)
-        self.query_thread.start()
+        # 清空表格，查询结果按页逐步填入
+        self.prepare_result_table(mode, server)
+        
+        # 在共享的查询执行器中查询（与进行中的相同查询合并）
+        previous_worker = self.query_worker
+        self.query_worker = QueryWorker(mode, server, '全部', rank_range, season,
+                                        get_query_executor(self.db_manager))
+        self.query_worker.page_ready.connect(self.handle_page_result)
+        self.query_worker.finished.connect(self.handle_query_result)
+        self.query_worker.progress.connect(self.update_progress)
+        self.query_worker.start()
+        
+        # 先提交新查询再取消上一次查询，参数相同时查询继续进行，不同时停止获取其后续分页
+        if previous_worker is not None:
+            previous_worker.cancel()
     
     def update_progress(self, value):
+        # 忽略已被取代的查询发出的信号
+        if self.sender() is not self.query_worker:
+            return
         self.progress_bar.setValue(value)
     
+    def prepare_result_table(self, mode, server=None):
+        """
+        按模式设置表头并清空表格
+        """
+        # 获取当前模式的处理器
+        mode_handler = self.mode_manager.get_mode_handler(mode)
+        
+        # 获取表格头部标签，合并所有服务器时增加所属服务器和服务器内排名
+        headers = mode_handler.get_table_headers()
+        if server == ALL_REGIONS:
+            headers = list(headers) + ['服务器', '服务器排名']
+        
+        # 设置表头并清空表格，同时取消之前的搜索过滤
+        self.result_model.set_headers(headers)
+        self.result_proxy.setFilterFixedString('')
+        self.result_model.set_highlight('')
+    
+    def handle_page_result(self, rows):
+        """
+        将新到达的一页数据按排名插入表格
+        """
+        if self.sender() is not self.query_worker:
+            return
+        
+        with metrics.timer('ui.render'):
+            self.result_model.insert_sorted_rows(rows)
+    
     def handle_query_result(self, data):
+        worker = self.sender()
+        if worker is not self.query_worker:
+            return
+        
         # 隐藏进度条
         self.progress_bar.setVisible(False)
         
+        # 查询记录的指标令牌，显示和保存完成后结束本次查询的统计
+        metrics_token = worker.metrics_token
+        
         if not data:
-            QMessageBox.information(self, '提示', '未查询到数据')
+            # 查询失败时清除已显示的部分数据
+            self.result_model.clear()
+            if metrics_token:
+                metrics.end(metrics_token, rows=0)
+            # 查询出错（如合并时某个服务器获取失败）时显示原因，不显示不完整的结果
+            if worker.error:
+                QMessageBox.warning(self, '查询失败', worker.error)
+            else:
+                QMessageBox.information(self, '提示', '未查询到数据')
             return
         
-        # 获取当前模式的处理器
-        mode = self.mode_combo.currentText()
-        mode_handler = self.mode_manager.get_mode_handler(mode)
-        
-        # 获取表格头部标签
-        headers = mode_handler.get_table_headers()
-        
-        # 设置表格列数和表头
-        self.result_table.setColumnCount(len(headers))
-        self.result_table.setHorizontalHeaderLabels(headers)
+        # 逐页显示的行数与最终结果不一致时重新填充表格
+        with metrics.timer('ui.render'):
+            if self.result_model.rowCount() != len(data):
+                self.result_model.set_rows(data)
         
-        # 重新设置列宽自动填充
-        for i in range(len(headers)):
-            self.result_table.horizontalHeader().setSectionResizeMode(i, QHeaderView.Stretch)
+        # 保存到数据库（按发起查询时的参数，只更新本次查询的排名范围）
+        self.save_to_database(data, worker.mode, worker.server, worker.season, worker.rank_range)
         
-        # 填充表格
-        self.result_table.setRowCount(len(data))
-        for row_idx, row_data in enumerate(data):
-            # 填充数据
-            for col_idx, col_data in enumerate(row_data):
-                if col_idx < len(headers):
-                    item = QTableWidgetItem(str(col_data))
-                    item.setTextAlignment(Qt.AlignCenter)
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)  # 设置为只读
-                    self.result_table.setItem(row_idx, col_idx, item)
-        
-        # 调整列宽
-        self.result_table.resizeColumnsToContents()
-        
-        # 重新设置列宽自动填充
-        for i in range(len(headers)):
-            self.result_table.horizontalHeader().setSectionResizeMode(i, QHeaderView.Stretch)
-        
-        # 保存到数据库
-        self.save_to_database(data)
+        if metrics_token:
+            metrics.end(metrics_token, rows=len(data))
     
-    def save_to_database(self, data):
+    def save_to_database(self, data, mode, server, season_num, rank_range=None):
         # 保存数据到数据库
-        mode = self.mode_combo.currentText()
-        server = self.server_combo.currentText()
-        season_num = self.season_combo.currentText()
-        
         # 统一赛季格式为"第X赛季"
         season = f'第{season_num}赛季'
         
-        self.db_manager.save_data(data, season, mode, server)
+        # 合并结果按各行所属的服务器分别保存
+        if server == ALL_REGIONS:
+            self.db_manager.save_merged_data(data, season, mode)
+            return
+        
+        self.db_manager.save_data(data, season, mode, server,
+                                  parse_rank_range(rank_range) if rank_range else None)
     
     def export_data(self):
-        # 导出数据到Excel
+        # 导出当前选择的赛季、模式和服务器的数据
         mode = self.mode_combo.currentText()
         server = self.server_combo.currentText()
         season = self.season_combo.currentText()
+        # 选择全部服务器时导出所有服务器的数据
+        server_filter = None if server == ALL_REGIONS else server
         
-        # 从数据库获取数据
-        df = self.db_manager.get_data(mode, server)
-        
-        if df.empty:
+        # 检查数据库中是否有可导出的数据
+        if not self.db_manager.get_season_data(season, limit=1, mode=mode, server=server_filter):
             QMessageBox.information(self, '提示', '没有数据可导出')
             return
         
-        # 导出到Excel
-        filename = f'{mode}_{server}_{season}.xlsx'
-        df.to_excel(filename, index=False)
+        # 选择导出文件和格式
+        default_filename = f'{mode}_{server}_{season}.xlsx'
+        filename, _ = QFileDialog.getSaveFileName(
+            self, '导出数据', default_filename,
+            'Excel 文件 (*.xlsx);;CSV 文件 (*.csv);;Parquet 文件 (*.parquet)'
+        )
+        if not filename:
+            return
+        
+        # 在后台线程中分块导出，避免阻塞界面
+        self.export_btn.setEnabled(False)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)  # 总行数未知，显示忙碌状态
         
-        QMessageBox.information(self, '提示', f'数据已导出到 {filename}')
+        self.export_thread = ExportThread(self.db_manager, filename, season, mode, server_filter)
+        self.export_thread.finished.connect(
+            lambda count, error: self.handle_export_result(filename, count, error))
+        self.export_thread.start()
+    
+    def handle_export_result(self, filename, count, error):
+        # 恢复界面状态
+        self.export_btn.setEnabled(True)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setVisible(False)
+        
+        if error:
+            QMessageBox.warning(self, '导出失败', error)
+        else:
+            QMessageBox.information(self, '提示', f'已导出 {count} 条数据到 {filename}')
     
     def open_settings(self):
         # 打开设置对话框
@@ -299,69 +448,47 @@ class HsRankQuery(QMainWindow):
     
     def import_missing_history_data(self, new_season):
         """
-        自动导入缺失的历史赛季数据
+        在后台同时导入缺失的历史赛季数据，各赛季的进度显示在进度条下方
         """
-        from PyQt5.QtCore import QThread, pyqtSignal
-        from PyQt5.QtWidgets import QProgressDialog
-        
-        # 计算需要导入的历史赛季数量
         history_seasons = list(range(1, new_season))
         if not history_seasons:
             return
         
-        # 创建导入线程
-        class ImportThread(QThread):
-            progress_update = pyqtSignal(int, str)
-            finished = pyqtSignal(int)
-            
-            def __init__(self, seasons, parent=None):
-                super().__init__(parent)
-                self.seasons = seasons
-                self.db_manager = DatabaseManager()
-            
-            def run(self):
-                imported_count = 0
-                
-                # 遍历所有历史赛季
-                for i, season_num in enumerate(self.seasons):
-                    season_name = f'第{season_num}赛季'
-                    self.progress_update.emit(i, f'正在检查 {season_name}...')
-                    
-                    # 检查该赛季的数据是否已存在
-                    if not self.db_manager.check_season_exists(season_name):
-                        # 导入该赛季的数据
-                        self.progress_update.emit(i, f'正在导入 {season_name}...')
-                        import_season_data(season_name, season_num)
-                        imported_count += 1
-                
-                self.progress_update.emit(len(self.seasons), '导入完成！')
-                self.finished.emit(imported_count)
-        
-        # 创建进度对话框
-        progress = QProgressDialog(self)
-        progress.setWindowTitle('导入历史数据')
-        progress.setLabelText('正在检查并导入历史赛季数据...')
-        progress.setMinimum(0)
-        progress.setMaximum(len(history_seasons))
-        progress.setValue(0)
-        progress.setModal(True)
-        
-        # 创建并启动导入线程
-        import_thread = ImportThread(history_seasons)
-        
-        # 连接信号
-        import_thread.progress_update.connect(lambda i, text: (progress.setValue(i), progress.setLabelText(text)))
-        import_thread.finished.connect(lambda count: (progress.setValue(len(history_seasons)), 
-                                                     progress.close(), 
-                                                     QMessageBox.information(self, '提示', 
-                                                                             f'成功导入 {count} 个历史赛季的数据！' if count > 0 else 
-                                                                             '所有历史赛季的数据已存在，无需重复导入。')))
-        
-        # 启动线程
-        import_thread.start()
-        
-        # 显示进度对话框
-        progress.exec_()
+        # 导入任务在窗口内复用，导入进行中时新提交的赛季并入当前批次
+        if self.import_worker is None:
+            self.import_worker = ImportWorker(self.db_manager)
+            self.import_worker.season_progress.connect(self.update_import_progress)
+            self.import_worker.finished.connect(self.handle_import_result)
+        
+        self.import_worker.start(history_seasons)
+    
+    def update_import_progress(self, season_num, status, completed, total):
+        """
+        更新单个赛季的导入状态
+        """
+        if status == STATUS_FETCHING:
+            text = f'{completed * 100 // total}%' if total else '获取中'
+        else:
+            text = IMPORT_STATUS_TEXT.get(status, status)
+        self.import_progress[season_num] = text
+        
+        self.import_status_label.setText('导入历史数据: ' + '  '.join(
+            f'第{season}赛季 {text}' for season, text in sorted(self.import_progress.items())))
+        self.import_status_label.setVisible(True)
+    
+    def handle_import_result(self, imported, failed):
+        """
+        导入结束后显示汇总，几秒后隐藏导入状态
+        """
+        self.import_progress.clear()
+        if failed:
+            text = f'历史数据导入结束：成功导入 {imported} 个赛季，{failed} 个赛季失败'
+        elif imported:
+            text = f'成功导入 {imported} 个历史赛季的数据！'
+        else:
+            text = '所有历史赛季的数据已存在，无需重复导入。'
+        self.import_status_label.setText(text)
+        QTimer.singleShot(5000, lambda: self.import_status_label.setVisible(bool(self.import_progress)))
     
     def search_player(self):
         """
@@ -373,35 +500,16 @@ class HsRankQuery(QMainWindow):
             QMessageBox.information(self, '提示', '请输入玩家名字')
             return
         
-        # 搜索匹配的玩家
-        matched_rows = []
-        
-        for row in range(self.result_table.rowCount()):
-            # 统一玩家ID在第二列（索引1）
-            player_col = 1
-            
-            player_item = self.result_table.item(row, player_col)
-            if player_item:
-                player_name = player_item.text()
-                if search_text.lower() in player_name.lower():
-                    matched_rows.append(row)
-                    # 显示匹配的行
-                    self.result_table.setRowHidden(row, False)
-                    # 高亮显示匹配的行
-                    for col in range(self.result_table.columnCount()):
-                        item = self.result_table.item(row, col)
-                        if item:
-                            item.setBackground(Qt.yellow)
-                else:
-                    # 隐藏不匹配的行
-                    self.result_table.setRowHidden(row, True)
+        # 通过代理模型过滤不匹配的行，并高亮匹配的行
+        self.result_proxy.setFilterFixedString(search_text)
+        self.result_model.set_highlight(search_text)
+        matched_count = self.result_proxy.rowCount()
         
         # 显示搜索结果
-        if matched_rows:
-            # 滚动到第一个匹配的行，使用固定的玩家ID列（索引1）
-            player_col = 1
-            self.result_table.scrollToItem(self.result_table.item(matched_rows[0], player_col))
-            QMessageBox.information(self, '搜索结果', f'找到 {len(matched_rows)} 个匹配的玩家')
+        if matched_count:
+            # 滚动到第一个匹配的行
+            self.result_table.scrollToTop()
+            QMessageBox.information(self, '搜索结果', f'找到 {matched_count} 个匹配的玩家')
         else:
             QMessageBox.information(self, '搜索结果', '未找到匹配的玩家')
     
@@ -412,14 +520,9 @@ class HsRankQuery(QMainWindow):
         # 清空搜索输入框
         self.search_input.clear()
         
-        # 显示所有行
-        for row in range(self.result_table.rowCount()):
-            self.result_table.setRowHidden(row, False)
-            # 重置背景色
-            for col in range(self.result_table.columnCount()):
-                item = self.result_table.item(row, col)
-                if item:
-                    item.setBackground(self.result_table.palette().base())
+        # 显示所有行并取消高亮
+        self.result_proxy.setFilterFixedString('')
+        self.result_model.set_highlight('')
     
     def open_player_query_window(self):
         """
@@ -427,6 +530,13 @@ class HsRankQuery(QMainWindow):
         """
         self.player_query_window = PlayerQueryWindow(self.db_manager)
         self.player_query_window.show()
+    
+    def open_diagnostics_window(self):
+        """
+        打开诊断窗口
+        """
+        self.diagnostics_window = DiagnosticsWindow()
+        self.diagnostics_window.show()
 
 class PlayerQueryWindow(QMainWindow):
     """
@@ -471,24 +581,36 @@ class PlayerQueryWindow(QMainWindow):
         self.search_btn.setFont(font)
         self.search_btn.clicked.connect(self.search_player)
         
+        # 排名走势按钮
+        self.trajectory_btn = QPushButton('排名走势')
+        self.trajectory_btn.setFont(font)
+        self.trajectory_btn.clicked.connect(self.show_trajectory)
+        
         # 添加到搜索布局
         search_layout.addWidget(self.search_label)
         search_layout.addWidget(self.search_input)
         search_layout.addWidget(self.search_btn)
+        search_layout.addWidget(self.trajectory_btn)
         
-        # 结果表格
-        self.result_table = QTableWidget()
-        self.result_table.setColumnCount(4)
-        self.result_table.setHorizontalHeaderLabels(['赛季', '玩家', '积分', '排名'])
+        # 结果表格（模型只保存数据，单元格按需渲染）
+        self.result_model = RankTableModel(['赛季', '模式', '服务器', '玩家', '积分', '排名'])
+        self.result_table = QTableView()
+        self.result_table.setModel(self.result_model)
         header_font = QFont('Arial', 12, QFont.Bold)
         self.result_table.horizontalHeader().setFont(header_font)
         self.result_table.setAlternatingRowColors(True)
+        # 固定行高，避免逐行测量
+        self.result_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         # 设置列宽自动填充
-        for i in range(4):
-            self.result_table.horizontalHeader().setSectionResizeMode(i, QHeaderView.Stretch)
+        self.result_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        
+        # 生涯汇总
+        self.career_label = QLabel()
+        self.career_label.setFont(font)
         
         # 添加到主布局
         main_layout.addLayout(search_layout)
+        main_layout.addWidget(self.career_label)
         main_layout.addWidget(self.result_table)
     
     def search_player(self):
@@ -501,42 +623,144 @@ class PlayerQueryWindow(QMainWindow):
             QMessageBox.information(self, '提示', '请输入玩家名字')
             return
         
-        # 从数据库获取玩家数据
-        df = self.db_manager.get_player_data(player_name)
+        # 从数据库获取玩家数据（预先汇总的每赛季最好成绩和生涯汇总）
+        rows = self.db_manager.get_player_data(player_name)
         
-        if df.empty:
+        if not rows:
+            self.career_label.setText('')
             QMessageBox.information(self, '提示', f'未找到玩家 {player_name} 的数据')
             return
         
-        # 设置表格列数和表头
-        headers = ['赛季', '玩家', '积分', '排名']
-        self.result_table.setColumnCount(len(headers))
-        self.result_table.setHorizontalHeaderLabels(headers)
+        # 填充表格
+        self.result_model.set_rows(rows)
+        
+        # 显示生涯汇总（匹配到多个玩家时只显示积分最高的前5个）
+        self.career_label.setText('\n'.join(
+            f'{player}（{mode} {server}）：参加 {seasons} 个赛季，最好排名 {best_rank}，最高积分 {best_score}，'
+            f'最近赛季 第{last_season}赛季'
+            for player, mode, server, seasons, best_rank, best_score, last_season in self.db_manager.get_player_career(player_name)[:5]
+        ))
+        
+        QMessageBox.information(self, '查询结果', f'找到玩家 {player_name} 的 {len(rows)} 条赛季记录')
+    
+    def show_trajectory(self):
+        """
+        显示玩家在当前赛季的排名走势（来自后台快照）
+        """
+        from PyQt5.QtWidgets import QDialog
+        from datetime import datetime
+        from snapshots import SnapshotStore
+        
+        player_name = self.search_input.text().strip()
+        if not player_name:
+            QMessageBox.information(self, '提示', '请输入玩家名字')
+            return
+        
+        # 快照只记录默认模式和服务器，匹配到多个玩家时显示其中积分最高的玩家
+        players = self.db_manager.get_player_career(player_name, DEFAULT_MODE, DEFAULT_SERVER)
+        player = players[0][0] if players else player_name
         
-        # 重新设置列宽自动填充
-        for i in range(len(headers)):
-            self.result_table.horizontalHeader().setSectionResizeMode(i, QHeaderView.Stretch)
+        season = ConfigManager().get_current_season()
+        trajectory = SnapshotStore(self.db_manager).get_player_trajectory(player, season)
+        if not trajectory:
+            QMessageBox.information(self, '提示', f'暂无玩家 {player} 在第{season}赛季的快照数据')
+            return
         
-        # 填充表格
-        self.result_table.setRowCount(len(df))
-        for row_idx, row_data in enumerate(df.itertuples(index=False)):
-            for col_idx, col_data in enumerate(row_data):
-                if col_idx < len(headers):
-                    item = QTableWidgetItem(str(col_data))
-                    item.setTextAlignment(Qt.AlignCenter)
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)  # 设置为只读
-                    self.result_table.setItem(row_idx, col_idx, item)
-        
-        # 调整列宽
-        self.result_table.resizeColumnsToContents()
-        
-        # 重新设置列宽自动填充
-        for i in range(len(headers)):
-            self.result_table.horizontalHeader().setSectionResizeMode(i, QHeaderView.Stretch)
-        
-        QMessageBox.information(self, '查询结果', f'找到玩家 {player_name} 在 {len(df)} 个赛季的数据')
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f'{player} 第{season}赛季排名走势')
+        dialog.resize(700, 500)
+        layout = QVBoxLayout(dialog)
+        
+        model = RankTableModel(['时间', '排名', '积分'])
+        model.set_rows([
+            (datetime.fromtimestamp(taken_at).strftime('%Y-%m-%d %H:%M'),
+             rank if rank is not None else '未上榜', score if score is not None else '')
+            for taken_at, rank, score in trajectory
+        ])
+        table = QTableView()
+        table.setModel(model)
+        table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(table)
+        
+        dialog.exec_()
+
+class DiagnosticsWindow(QMainWindow):
+    """
+    诊断窗口，显示各阶段耗时和请求计数器
+    """
+    def __init__(self):
+        super().__init__()
+        self.initUI()
+        
+        # 定时刷新
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(1000)
+        self.refresh()
+    
+    def initUI(self):
+        # 设置窗口标题和大小
+        self.setWindowTitle('诊断')
+        self.setGeometry(250, 250, 900, 600)
+        
+        # 创建中央部件
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        main_layout = QVBoxLayout(central_widget)
+        
+        # 阶段耗时表格
+        self.timing_model = RankTableModel(['阶段', '次数', '总耗时(ms)', '平均(ms)', '最大(ms)'])
+        self.timing_table = QTableView()
+        self.timing_table.setModel(self.timing_model)
+        self.timing_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        
+        # 计数器表格
+        self.counter_model = RankTableModel(['计数器', '值'])
+        self.counter_table = QTableView()
+        self.counter_table.setModel(self.counter_model)
+        self.counter_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        
+        # 按钮
+        button_layout = QHBoxLayout()
+        self.reset_btn = QPushButton('清空')
+        self.reset_btn.clicked.connect(self.reset)
+        log_label = QLabel(f'日志文件: {metrics.log_file}')
+        button_layout.addWidget(log_label)
+        button_layout.addStretch()
+        button_layout.addWidget(self.reset_btn)
+        
+        main_layout.addWidget(self.timing_table, 3)
+        main_layout.addWidget(self.counter_table, 2)
+        main_layout.addLayout(button_layout)
+    
+    def refresh(self):
+        """
+        刷新指标显示
+        """
+        snapshot = metrics.snapshot()
+        
+        timing_rows = []
+        for stage, timing in sorted(snapshot['timings'].items()):
+            total_ms = timing['total'] * 1000
+            timing_rows.append((stage, timing['count'], f'{total_ms:.1f}',
+                                f"{total_ms / timing['count']:.2f}", f"{timing['max'] * 1000:.2f}"))
+        self.timing_model.set_rows(timing_rows)
+        self.counter_model.set_rows(sorted(snapshot['counters'].items()))
+    
+    def reset(self):
+        """
+        清空指标
+        """
+        metrics.reset()
+        self.refresh()
 
 if __name__ == '__main__':
+    # --profile 对每次查询启用cProfile和tracemalloc分析（也可设置环境变量 HS_RANK_PROFILE=1）
+    if '--profile' in sys.argv:
+        sys.argv.remove('--profile')
+        metrics.profiling_enabled = True
+    
     app = QApplication(sys.argv)
     window = HsRankQuery()
     window.show()
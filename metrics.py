@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# 性能指标模块：各阶段计时、计数器、结构化日志以及可选的cProfile/tracemalloc分析
+#
+# 设置环境变量 HS_RANK_PROFILE=1（或启动参数 --profile）后，每次查询和导入都会在 profiles/ 目录下
+# 生成 cProfile 统计文件和 tracemalloc 内存快照
+
+
+class Metrics:
+    """
+    线程安全的指标收集器
+    计时按阶段累计（次数、总耗时、最大耗时），计数器按名称累加
+    """
+    def __init__(self, log_file='hs_rank_metrics.jsonl', profile_dir='profiles'):
+        self.log_file = log_file
+        self.profile_dir = profile_dir
+        self.profiling_enabled = os.environ.get('HS_RANK_PROFILE') == '1'
+        self.lock = threading.Lock()
+        self.timings = {}
+        self.counters = {}
+        # 同时进行的分析共用tracemalloc，按使用计数启停；序号用于区分分析报告文件
+        self.tracing_users = 0
+        self.started_tracing = False
+        self.profile_seq = 0
+    
+    @contextmanager
+    def timer(self, stage):
+        """
+        统计代码块耗时
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+    
+    def record(self, stage, seconds):
+        """
+        记录一次阶段耗时（秒）
+        """
+        with self.lock:
+            timing = self.timings.get(stage)
+            if timing is None:
+                timing = self.timings[stage] = {'count': 0, 'total': 0.0, 'max': 0.0}
+            timing['count'] += 1
+            timing['total'] += seconds
+            timing['max'] = max(timing['max'], seconds)
+    
+    def incr(self, name, value=1):
+        """
+        计数器累加
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+    
+    def snapshot(self):
+        """
+        获取当前全部指标的副本
+        """
+        with self.lock:
+            return {
+                'timings': {stage: dict(timing) for stage, timing in self.timings.items()},
+                'counters': dict(self.counters)
+            }
+    
+    def reset(self):
+        """
+        清空全部指标
+        """
+        with self.lock:
+            self.timings.clear()
+            self.counters.clear()
+    
+    def begin(self, operation, **fields):
+        """
+        开始一次操作（查询、导入等），返回传给end()的令牌
+        操作可以跨线程结束，例如在工作线程开始、在界面线程结束
+        """
+        return {
+            'operation': operation,
+            'fields': fields,
+            'start_time': time.time(),
+            'start': time.perf_counter(),
+            'snapshot': self.snapshot()
+        }
+    
+    def end(self, token, **fields):
+        """
+        结束一次操作，将该操作期间的各阶段耗时和计数器增量写入结构化日志，并返回日志记录
+        """
+        before = token['snapshot']
+        after = self.snapshot()
+        
+        stages = {}
+        for stage, timing in after['timings'].items():
+            previous = before['timings'].get(stage, {'count': 0, 'total': 0.0})
+            count = timing['count'] - previous['count']
+            if count:
+                stages[stage] = {'count': count, 'total_ms': round((timing['total'] - previous['total']) * 1000, 3)}
+        
+        counters = {}
+        for name, value in after['counters'].items():
+            delta = value - before['counters'].get(name, 0)
+            if delta:
+                counters[name] = delta
+        
+        entry = {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(token['start_time'])),
+            'operation': token['operation'],
+            'duration_ms': round((time.perf_counter() - token['start']) * 1000, 3),
+            **token['fields'],
+            **fields,
+            'stages': stages,
+            'counters': counters
+        }
+        self.write_log(entry)
+        return entry
+    
+    def write_log(self, entry):
+        """
+        以JSON Lines格式追加写入日志文件
+        """
+        try:
+            with self.lock:
+                with open(self.log_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"写入指标日志失败: {e}")
+    
+    @contextmanager
+    def profile(self, name):
+        """
+        启用分析时，对代码块运行cProfile并记录tracemalloc内存快照（只分析当前线程）
+        多个代码块可以同时分析，tracemalloc在最后一个分析结束后才停止
+        """
+        if not self.profiling_enabled:
+            yield
+            return
+        
+        import cProfile
+        
+        with self.lock:
+            self.profile_seq += 1
+            seq = self.profile_seq
+        self.start_tracing()
+        
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            try:
+                self.write_profile(name, seq, profiler)
+            except Exception as e:
+                # 分析报告失败不影响被分析的操作
+                print(f"写入分析报告失败: {e}")
+            finally:
+                self.stop_tracing()
+    
+    def start_tracing(self):
+        """
+        增加tracemalloc的使用计数，第一个使用者启动跟踪
+        """
+        import tracemalloc
+        
+        with self.lock:
+            if self.tracing_users == 0:
+                # 外部已启动的跟踪不由本模块停止
+                self.started_tracing = not tracemalloc.is_tracing()
+                if self.started_tracing:
+                    tracemalloc.start()
+            self.tracing_users += 1
+    
+    def stop_tracing(self):
+        """
+        减少tracemalloc的使用计数，最后一个使用者停止由本模块启动的跟踪
+        """
+        import tracemalloc
+        
+        with self.lock:
+            self.tracing_users -= 1
+            if self.tracing_users == 0 and self.started_tracing:
+                tracemalloc.stop()
+                self.started_tracing = False
+    
+    def write_profile(self, name, seq, profiler):
+        """
+        写入cProfile统计文件和内存快照报告，文件名包含线程名和序号，同时进行的分析不会相互覆盖
+        """
+        import pstats
+        import tracemalloc
+        
+        memory_snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        
+        os.makedirs(self.profile_dir, exist_ok=True)
+        thread_name = threading.current_thread().name
+        prefix = os.path.join(self.profile_dir, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}_{thread_name}_{seq}")
+        profiler.dump_stats(f'{prefix}.prof')
+        with open(f'{prefix}.txt', 'w', encoding='utf-8') as f:
+            f.write(f'当前内存: {current / 1024:.1f} KB, 峰值内存: {peak / 1024:.1f} KB\n\n')
+            f.write('内存分配最多的代码行:\n')
+            for stat in memory_snapshot.statistics('lineno')[:20]:
+                f.write(f'{stat}\n')
+            f.write('\n累计耗时最多的函数:\n')
+            pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(30)
+
+
+# 全局共享的指标收集器
+metrics = Metrics()
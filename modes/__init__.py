@@ -1,36 +1,83 @@
+import importlib
+import pkgutil
+import threading
+
 # 模式管理模块
+#
+# modes 下的每个子包是一个模式插件，其 handler.py 通过 MODE_HANDLER 声明处理器类。
+# 插件只在第一次使用时发现一次，处理器以单例形式缓存，之后的查询不再重复导入和创建。
+
+# 默认模式（未知模式回退到该模式）
+DEFAULT_MODE_KEY = 'undergroundarena'
+
+_handlers = None
+_lock = threading.Lock()
+
+
+def discover_handlers():
+    """
+    发现并创建所有模式处理器，返回按显示顺序排列的 {模式键: 处理器} 字典（只在第一次调用时扫描）
+    """
+    global _handlers
+    
+    if _handlers is None:
+        with _lock:
+            if _handlers is None:
+                handlers = []
+                for module_info in pkgutil.iter_modules(__path__):
+                    if not module_info.ispkg:
+                        continue
+                    try:
+                        module = importlib.import_module(f'{__name__}.{module_info.name}.handler')
+                        handler = module.MODE_HANDLER()
+                    except (ImportError, AttributeError) as e:
+                        print(f"加载模式插件 {module_info.name} 失败: {e}")
+                        continue
+                    handlers.append(handler)
+                
+                handlers.sort(key=lambda handler: handler.display_order)
+                _handlers = {handler.mode_name: handler for handler in handlers}
+    
+    return _handlers
+
 
 class ModeManager:
     """
-    模式管理器，用于管理不同游戏模式的处理逻辑
+    模式管理器，用于管理不同游戏模式的处理逻辑（所有实例共享同一份处理器缓存）
     """
     def __init__(self):
-        self.modes = {
-            '地下竞技场': 'undergroundarena'
-        }
+        self.handlers = discover_handlers()
+        # 显示名称到模式键的映射
+        self.modes = {handler.display_name: mode_key for mode_key, handler in self.handlers.items()}
+    
+    def get_mode_names(self):
+        """
+        获取所有模式的显示名称（按显示顺序）
+        """
+        return list(self.modes)
     
     def get_mode_key(self, mode_name):
         """
-        获取模式对应的键值
+        获取模式对应的键值（接受显示名称或键值）
+        """
+        if mode_name in self.handlers:
+            return mode_name
+        return self.modes.get(mode_name, DEFAULT_MODE_KEY)
+    
+    def has_mode(self, mode_name):
+        """
+        判断模式（显示名称或键值）是否存在
         """
-        return self.modes.get(mode_name, 'undergroundarena')
+        return mode_name in self.handlers or mode_name in self.modes
+    
+    def get_display_name(self, mode_name):
+        """
+        获取模式的显示名称（数据库中保存的模式名称），接受显示名称或键值
+        """
+        return self.get_mode_handler(mode_name).display_name
     
     def get_mode_handler(self, mode_name):
         """
-        获取模式对应的处理器
-        """
-        mode_key = self.get_mode_key(mode_name)
-        
-        try:
-            # 动态导入模式处理器
-            if mode_key == 'undergroundarena':
-                from modes.undergroundarena.handler import UndergroundArenaHandler
-                return UndergroundArenaHandler()
-            else:
-                # 默认使用地下竞技场处理器
-                from modes.undergroundarena.handler import UndergroundArenaHandler
-                return UndergroundArenaHandler()
-        except ImportError:
-            # 如果导入失败，返回默认处理器
-            from modes.undergroundarena.handler import UndergroundArenaHandler
-            return UndergroundArenaHandler()
+        获取模式对应的处理器，未知模式返回默认处理器
+        """
+        return self.handlers.get(self.get_mode_key(mode_name)) or self.handlers[DEFAULT_MODE_KEY]
@@ -0,0 +1 @@
+# 标准模式天梯模块
\ No newline at end of file
@@ -0,0 +1,65 @@
+# 标准模式天梯处理器
+#
+# 天梯的赛季号与地下竞技场不同，需要在config.json中配置赛季号的对应关系后才能在线查询，例如：
+#   "modes": {"standard": {"season_ids": {"5": 130}}}
+from config import ConfigManager
+from leaderboard import Leaderboard
+from page_fetcher import PAGE_SIZE
+
+class StandardHandler:
+    """
+    标准模式天梯（传说排名）的处理器
+    """
+    # 模式键和界面显示名称
+    mode_name = 'standard'
+    display_name = '标准模式'
+    # 在模式下拉框中的顺序
+    display_order = 10
+    # 分页约定：每页人数
+    page_size = PAGE_SIZE
+    
+    def get_api_params(self, season):
+        """
+        获取API请求参数，赛季号按配置转换为天梯赛季号，未配置的赛季抛出ValueError
+        """
+        season_ids = ConfigManager().get_mode_settings(self.mode_name).get('season_ids') or {}
+        season_id = season_ids.get(str(season))
+        if season_id is None:
+            raise ValueError(f'{self.display_name}未配置第{season}赛季对应的天梯赛季号，'
+                             f'请在config.json的modes.{self.mode_name}.season_ids中配置')
+        
+        return {
+            'mode_name': self.mode_name,
+            'season_id': season_id
+        }
+    
+    def get_table_headers(self):
+        """
+        获取表格头部标签
+        """
+        return ['排名', '玩家', '积分']
+    
+    def parse_api_data(self, data):
+        """
+        解析API返回的数据，返回Leaderboard（天梯排名没有积分时记为0）
+        """
+        parsed_data = Leaderboard()
+        
+        if data.get('code') == 0:
+            for item in data.get('data', {}).get('list', []):
+                rank = item.get('position')
+                player_name = item.get('battle_tag')
+                score = item.get('score') or 0
+                
+                parsed_data.append(rank, player_name, score)
+        
+        return parsed_data
+    
+    def get_database_columns(self):
+        """
+        获取数据库表列名
+        """
+        return ['season', 'player', 'score', 'rank']
+
+# 供模式管理器发现的处理器类
+MODE_HANDLER = StandardHandler
@@ -1,13 +1,19 @@
 # 地下竞技场模式处理器
+from leaderboard import Leaderboard
+from page_fetcher import PAGE_SIZE
 
 class UndergroundArenaHandler:
     """
     地下竞技场模式的处理器，负责处理该模式的特定逻辑
     """
     
-    def __init__(self):
-        self.mode_name = 'undergroundarena'
-        self.display_name = '地下竞技场'
+    # 模式键和界面显示名称
+    mode_name = 'undergroundarena'
+    display_name = '地下竞技场'
+    # 在模式下拉框中的顺序
+    display_order = 0
+    # 分页约定：每页人数
+    page_size = PAGE_SIZE
     
     def get_api_params(self, season):
         """
@@ -26,9 +32,9 @@ class UndergroundArenaHandler:
     
     def parse_api_data(self, data):
         """
-        解析API返回的数据
+        解析API返回的数据，返回Leaderboard
         """
-        parsed_data = []
+        parsed_data = Leaderboard()
         
         if data.get('code') == 0:
             for item in data.get('data', {}).get('list', []):
@@ -36,7 +42,7 @@ class UndergroundArenaHandler:
                 player_name = item.get('battle_tag')
                 score = item.get('score')
                 
-                parsed_data.append([rank, player_name, score])
+                parsed_data.append(rank, player_name, score)
         
         return parsed_data
     
@@ -45,3 +51,6 @@ class UndergroundArenaHandler:
         获取数据库表列名
         """
         return ['season', 'player', 'score', 'rank']
+
+# 供模式管理器发现的处理器类
+MODE_HANDLER = UndergroundArenaHandler
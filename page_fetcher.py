@@ -0,0 +1,221 @@
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http_client import get_http_client
+from metrics import metrics
+
+# 排行榜分页获取模块
+
+# 排行榜API每页返回的人数，排名窗口按该页大小对齐，使重叠窗口可以复用缓存的分页
+PAGE_SIZE = 25
+
+
+def parse_rank_range(rank_range):
+    """
+    解析"起始-结束"格式的排名范围（也接受单个排名），返回(start, end)，格式无效时抛出ValueError
+    """
+    parts = [part.strip() for part in str(rank_range).split('-')]
+    if len(parts) == 1:
+        parts = parts * 2
+    if len(parts) != 2 or not all(part.isdigit() for part in parts):
+        raise ValueError(f'无效的排名范围: {rank_range}')
+    
+    start, end = map(int, parts)
+    if start < 1 or end < start:
+        raise ValueError(f'无效的排名范围: {rank_range}')
+    return start, end
+
+
+def get_window_pages(start, end, page_size=PAGE_SIZE):
+    """
+    计算覆盖排名区间[start, end]的最少分页，第p页包含排名(p-1)*page_size+1到p*page_size
+    """
+    first_page = (start - 1) // page_size + 1
+    last_page = (end - 1) // page_size + 1
+    return range(first_page, last_page + 1)
+
+class PageFetcher:
+    """
+    排行榜分页获取器，按配置的并发上限同时请求多个分页
+    """
+    def __init__(self, api_base_url, max_workers=8, http_client=None, cache=None, region=None):
+        self.api_base_url = api_base_url
+        self.max_workers = max_workers
+        self.http_client = http_client or get_http_client()
+        # 响应缓存（可选），为None时每次都请求服务器
+        self.cache = cache
+        # 服务器请求约定（可选），为None时使用国服API的参数和响应格式
+        self.region = region
+    
+    def fetch_page(self, mode_name, season_id, page, page_size):
+        """
+        获取单个分页的原始响应数据
+        """
+        # 构建API请求参数
+        if self.region is not None:
+            params = self.region.build_params(mode_name, season_id, page, page_size)
+        else:
+            params = {
+                'page': page,
+                'page_size': page_size,
+                'mode_name': mode_name,
+                'season_id': season_id
+            }
+        
+        metrics.incr('pages.fetched')
+        
+        if self.cache is None:
+            # 通过共享客户端发送API请求（带重试和超时）
+            return self.adapt(self.http_client.get_json(self.api_base_url, params=params))
+        
+        # 缓存未过期时直接返回，过期时带上ETag/Last-Modified重新验证（其他服务器的缓存键带服务器前缀）
+        cache_mode = self.region.cache_prefix + mode_name if self.region is not None else mode_name
+        cache_key = (cache_mode, season_id, page, page_size)
+        entry = self.cache.get(*cache_key)
+        headers = None
+        if entry is not None:
+            if self.cache.is_fresh(entry):
+                metrics.incr('cache.hits')
+                with metrics.timer('parse.json'):
+                    return self.adapt(json.loads(entry['body']))
+            headers = self.cache.get_validators(entry)
+        
+        metrics.incr('cache.misses')
+        response = self.http_client.get(self.api_base_url, params=params, headers=headers)
+        
+        if response.status_code == 304 and entry is not None:
+            # 内容未变化，沿用缓存数据
+            metrics.incr('cache.revalidated')
+            self.cache.touch(*cache_key)
+            with metrics.timer('parse.json'):
+                return self.adapt(json.loads(entry['body']))
+        
+        with metrics.timer('parse.json'):
+            data = self.adapt(response.json())
+        
+        # 只缓存成功的响应（缓存原始响应）
+        if data.get('code') == 0:
+            self.cache.put(*cache_key, response.text,
+                           etag=response.headers.get('ETag'),
+                           last_modified=response.headers.get('Last-Modified'))
+        
+        return data
+    
+    def adapt(self, data):
+        """
+        将服务器响应转换为国服API的格式
+        """
+        return self.region.adapt(data) if self.region is not None else data
+    
+    def iter_pages(self, mode_name, season_id, pages, page_size, cancel_token=None):
+        """
+        并发获取多个分页，按完成顺序逐个产出(页码, 响应数据)
+        cancel_token被取消后不再发出新的请求，并在下一页完成时停止产出
+        """
+        pages = list(pages)
+        if not pages:
+            return
+        
+        def fetch(page):
+            # 排队中的请求在开始前检查是否已取消
+            if cancel_token is not None and cancel_token.cancelled:
+                return None
+            return self.fetch_page(mode_name, season_id, page, page_size)
+        
+        # 并发数不超过配置上限，也不超过页数
+        workers = max(1, min(self.max_workers, len(pages)))
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = {executor.submit(fetch, page): page for page in pages}
+        
+        try:
+            for future in as_completed(futures):
+                if cancel_token is not None and cancel_token.cancelled:
+                    break
+                # 任一分页失败会在此处抛出异常
+                yield futures[future], future.result()
+        finally:
+            # 调用方提前停止迭代或出错时，取消尚未开始的请求
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+    
+    def iter_window(self, mode_name, season_id, start, end, page_size=PAGE_SIZE, cancel_token=None):
+        """
+        并发获取覆盖排名区间[start, end]的分页，按完成顺序产出(页码, 响应数据, 已知的最后一页)
+        遇到不满一页的分页说明排行榜已结束，其后的分页不再产出，尚未开始的请求被取消
+        空页不产出，因此已产出的分页都不超过最终的最后一页；分页返回错误时抛出ValueError，
+        不能当作空页产出，否则缺少的排名会被当作掉出排行榜
+        """
+        pages = get_window_pages(start, end, page_size)
+        last_page = pages[-1]
+        pending = set(pages)
+        
+        for page, data in self.iter_pages(mode_name, season_id, pages, page_size, cancel_token):
+            pending.discard(page)
+            if page > last_page:
+                continue
+            
+            if data.get('code') != 0:
+                raise ValueError(f'第 {page} 页返回错误: {data.get("message")}')
+            
+            item_count = len(self.get_page_items(data))
+            if item_count == 0:
+                # 空页说明排行榜在上一页之前已结束
+                last_page = page - 1
+                if not any(remaining <= last_page for remaining in pending):
+                    break
+                continue
+            if item_count < page_size:
+                last_page = page
+            
+            yield page, data, last_page
+            
+            # 最后一页之前的分页都已完成时提前结束
+            if not any(remaining <= last_page for remaining in pending):
+                break
+    
+    def get_page_items(self, data):
+        """
+        提取响应中的数据列表，响应异常时返回空列表
+        """
+        if data.get('code') != 0:
+            return []
+        return data.get('data', {}).get('list', [])
+    
+    def find_last_page(self, mode_name, season_id, page_size, probed=None):
+        """
+        查找最后一个有数据的页码（先指数探测上界，再二分查找），没有数据时返回0
+        probed用于记录探测过程中获取到的响应，以页码为键；任一分页返回错误时抛出ValueError
+        """
+        if probed is None:
+            probed = {}
+        
+        def page_length(page):
+            if page not in probed:
+                data = self.fetch_page(mode_name, season_id, page, page_size)
+                # 错误响应不能当作空页，否则会得到偏小的总页数
+                if data.get('code') != 0:
+                    raise ValueError(f'第 {page} 页返回错误: {data.get("message")}')
+                probed[page] = data
+            return len(self.get_page_items(probed[page]))
+        
+        if page_length(1) == 0:
+            return 0
+        
+        # 指数探测：lo始终为已知非空页，hi为第一个空页
+        lo, hi = 1, 2
+        while True:
+            if page_length(lo) < page_size:
+                return lo  # 不满一页说明已经是最后一页
+            if page_length(hi) == 0:
+                break
+            lo, hi = hi, hi * 2
+        
+        # 二分查找最后一个非空页
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if page_length(mid) > 0:
+                lo = mid
+            else:
+                hi = mid
+        
+        return lo
@@ -0,0 +1,214 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from leaderboard import Leaderboard
+from metrics import metrics
+from regions import ALL_REGIONS
+
+# 查询执行器：共享线程池运行排行榜查询，支持取消，并合并相同的进行中查询
+#
+# 相同参数的查询同时进行时只请求一次（single-flight），各调用方通过各自的句柄订阅分页和结果；
+# 句柄取消后不再收到任何回调，最后一个订阅者取消时查询停止获取后续分页。
+
+
+class CancelToken:
+    """
+    取消标记，在线程间传递，由获取分页的循环检查
+    指定parent时，parent被取消也视为已取消
+    """
+    def __init__(self, parent=None):
+        self.event = threading.Event()
+        self.parent = parent
+    
+    def cancel(self):
+        self.event.set()
+    
+    @property
+    def cancelled(self):
+        return self.event.is_set() or (self.parent is not None and self.parent.cancelled)
+
+
+class QueryCancelled(Exception):
+    """
+    查询在完成前被取消
+    """
+
+
+class QueryTask:
+    """
+    一次实际执行的查询，可被多个句柄共享
+    """
+    def __init__(self, key):
+        self.key = key
+        self.token = CancelToken()
+        self.future = None
+        self.subscribers = 0
+        # 已产出的分页(已完成页数, 总页数, 本页数据)，供后加入的订阅者补发
+        self.pages = []
+        self.listeners = {}
+        self.lock = threading.Lock()
+    
+    def add_listener(self, handle, on_page):
+        """
+        订阅分页，先补发已产出的分页
+        """
+        with self.lock:
+            for page in self.pages:
+                on_page(*page)
+            self.listeners[handle] = on_page
+    
+    def remove_listener(self, handle):
+        with self.lock:
+            self.listeners.pop(handle, None)
+    
+    def publish(self, completed, total, rows):
+        """
+        向所有订阅者发送新产出的分页
+        """
+        with self.lock:
+            self.pages.append((completed, total, rows))
+            for on_page in list(self.listeners.values()):
+                on_page(completed, total, rows)
+
+
+class QueryHandle:
+    """
+    调用方持有的查询句柄
+    """
+    def __init__(self, executor, task):
+        self.executor = executor
+        self.task = task
+        self.cancelled = False
+    
+    def cancel(self):
+        """
+        取消订阅，之后不再收到分页和结果回调
+        """
+        if not self.cancelled:
+            self.cancelled = True
+            self.executor.release(self)
+    
+    def done(self):
+        return self.cancelled or self.task.future.done()
+    
+    def result(self, timeout=None):
+        """
+        等待并返回按排名排序的Leaderboard，查询被取消时抛出QueryCancelled
+        """
+        if self.cancelled:
+            raise QueryCancelled()
+        return self.task.future.result(timeout)
+    
+    def add_done_callback(self, callback):
+        """
+        查询结束时调用callback(handle)，句柄已取消时不调用
+        """
+        def on_done(future):
+            if not self.cancelled:
+                callback(self)
+        self.task.future.add_done_callback(on_done)
+
+
+class QueryExecutor:
+    """
+    共享的查询执行器，所有查询复用同一个APIHandler（及其模式处理器、分页获取器和数据库连接）
+    """
+    def __init__(self, api_handler=None, max_workers=4, db_manager=None):
+        if api_handler is None:
+            from api_handler import APIHandler
+            api_handler = APIHandler(db_manager)
+        self.api_handler = api_handler
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='query')
+        # 进行中的查询 {查询参数: QueryTask}
+        self.in_flight = {}
+        self.lock = threading.Lock()
+    
+    def submit(self, mode, server, player_class, rank_range, season, on_page=None):
+        """
+        提交查询，返回QueryHandle；相同参数的查询正在进行时直接加入该查询
+        on_page(已完成页数, 总页数, 本页数据)在查询线程中调用
+        """
+        key = (mode, server, player_class, rank_range, str(season))
+        
+        with self.lock:
+            task = self.in_flight.get(key)
+            if task is None:
+                task = QueryTask(key)
+                self.in_flight[key] = task
+                task.future = self.pool.submit(self.run_task, task)
+                metrics.incr('query.started')
+            else:
+                metrics.incr('query.merged')
+            task.subscribers += 1
+            handle = QueryHandle(self, task)
+        
+        if on_page is not None:
+            task.add_listener(handle, on_page)
+        return handle
+    
+    def release(self, handle):
+        """
+        句柄取消订阅，没有订阅者时取消查询
+        """
+        task = handle.task
+        task.remove_listener(handle)
+        
+        with self.lock:
+            task.subscribers -= 1
+            if task.subscribers <= 0:
+                task.token.cancel()
+                # 取消后的相同查询重新开始，不再合并到正在停止的查询
+                if self.in_flight.get(task.key) is task:
+                    del self.in_flight[task.key]
+                metrics.incr('query.cancelled')
+    
+    def run_task(self, task):
+        """
+        在线程池中执行查询，流式发送分页，返回按排名排序的Leaderboard
+        """
+        try:
+            mode, server, player_class, rank_range, season = task.key
+            if server == ALL_REGIONS:
+                # 跨服务器合并的结果一次产出，行格式为(全局排名, 玩家, 积分, 服务器, 服务器排名)
+                with metrics.profile('query'):
+                    rows = self.api_handler.get_global_rank_data(mode, None, rank_range, season, task.token)
+                if task.token.cancelled:
+                    raise QueryCancelled()
+                return rows
+            
+            all_data = Leaderboard()
+            
+            with metrics.profile('query'):
+                for completed, total, rows in self.api_handler.iter_rank_data(*task.key, cancel_token=task.token):
+                    all_data.extend(rows)
+                    task.publish(completed, total, rows)
+                
+                if task.token.cancelled:
+                    raise QueryCancelled()
+                
+                # 按排名排序
+                with metrics.timer('query.sort'):
+                    all_data.sort(by='rank')
+            
+            return all_data
+        finally:
+            with self.lock:
+                if self.in_flight.get(task.key) is task:
+                    del self.in_flight[task.key]
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_query_executor(db_manager=None):
+    """
+    获取全局共享的查询执行器，首次创建时使用db_manager（调用方已初始化的数据库）
+    """
+    global _executor
+    
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = QueryExecutor(db_manager=db_manager)
+    
+    return _executor
@@ -1,32 +1,62 @@
-from PyQt5.QtCore import QThread, pyqtSignal
-from api_handler import APIHandler
+from PyQt5.QtCore import QObject, pyqtSignal
+from leaderboard import Leaderboard
+from metrics import metrics
+from query_executor import get_query_executor, QueryCancelled
 
-class QueryThread(QThread):
-    finished = pyqtSignal(list)
+class QueryWorker(QObject):
+    """
+    界面查询任务：在共享的查询执行器中运行，通过信号把分页和结果送回界面线程
+    取消后不再发出任何信号
+    """
+    finished = pyqtSignal(object)
     progress = pyqtSignal(int)
+    # 每获取完一页发出该页数据（Leaderboard，按完成顺序，未排序）
+    page_ready = pyqtSignal(object)
     
-    def __init__(self, mode, server, player_class, rank_range, season):
+    def __init__(self, mode, server, player_class, rank_range, season, executor=None):
         super().__init__()
         self.mode = mode
         self.server = server
         self.player_class = player_class
         self.rank_range = rank_range
         self.season = season
-        self.api_handler = APIHandler()
+        self.executor = executor or get_query_executor()
+        self.handle = None
+        # 本次查询的指标令牌，由界面在显示和保存完成后结束
+        self.metrics_token = None
+        # 查询失败时的错误信息，在发出finished之前设置
+        self.error = None
     
-    def run(self):
+    def start(self):
+        self.metrics_token = metrics.begin('query', mode=self.mode, server=self.server,
+                                           rank_range=self.rank_range, season=self.season)
+        self.handle = self.executor.submit(self.mode, self.server, self.player_class, self.rank_range,
+                                           self.season, on_page=self.on_page)
+        self.handle.add_done_callback(self.on_done)
+    
+    def cancel(self):
+        """
+        取消查询（相同查询的其他订阅者不受影响）
+        """
+        if self.handle is not None and not self.handle.done():
+            self.handle.cancel()
+            metrics.end(self.metrics_token, cancelled=True)
+    
+    def is_finished(self):
+        return self.handle is not None and self.handle.done()
+    
+    def on_page(self, completed, total, rows):
+        # 在查询线程中调用，信号以队列方式送到界面线程
+        self.page_ready.emit(rows)
+        self.progress.emit(completed * 100 // total)
+    
+    def on_done(self, handle):
         try:
-            # 模拟API调用进度
-            self.progress.emit(25)
-            
-            # 获取数据
-            data = self.api_handler.get_rank_data(self.mode, self.server, self.player_class, self.rank_range, self.season)
-            
-            self.progress.emit(75)
-            
-            self.progress.emit(100)
-            
-            self.finished.emit(data)
+            data = handle.result()
+        except QueryCancelled:
+            return
         except Exception as e:
             print(f"查询出错: {e}")
-            self.finished.emit([])
\ No newline at end of file
+            self.error = str(e)
+            data = Leaderboard()
+        self.finished.emit(data)
@@ -0,0 +1,103 @@
+import threading
+import time
+
+# 请求限流模块：令牌桶限制请求速率，AIMD算法自适应调整并发数
+
+
+class TokenBucket:
+    """
+    令牌桶限流器，rate为每秒补充的令牌数，burst为桶容量；rate不大于0时不限流
+    """
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """
+        取出一个令牌，令牌不足时等待
+        """
+        if self.rate <= 0:
+            return
+        
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                
+                wait = (1 - self.tokens) / self.rate
+            
+            time.sleep(wait)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD自适应并发控制
+    请求成功且延迟正常时并发上限加性增长（每轮约+1），遇到限流、服务端错误或延迟突增时乘性下降
+    """
+    def __init__(self, initial=4, min_limit=1, max_limit=16, decrease_factor=0.5,
+                 latency_threshold=2.0, smoothing=0.1):
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.limit = float(min(max(initial, min_limit), self.max_limit))
+        self.decrease_factor = decrease_factor
+        # 延迟超过基线的latency_threshold倍视为延迟突增
+        self.latency_threshold = latency_threshold
+        self.smoothing = smoothing
+        self.baseline_latency = None
+        self.last_decrease = 0.0
+        self.in_flight = 0
+        self.condition = threading.Condition()
+    
+    def acquire(self):
+        """
+        获取一个并发名额，已达上限时等待
+        """
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+    
+    def release(self, latency=None, throttled=False):
+        """
+        归还并发名额，并根据本次请求的结果调整并发上限
+        throttled表示请求被限流或服务端出错，latency为成功请求的耗时（秒）
+        """
+        with self.condition:
+            self.in_flight -= 1
+            
+            if throttled:
+                self.decrease()
+            elif latency is not None:
+                if self.baseline_latency is not None and latency > self.baseline_latency * self.latency_threshold:
+                    self.decrease()
+                else:
+                    # 加性增长：每完成约limit个请求（一轮）上限加1
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                
+                # 用指数移动平均更新延迟基线
+                if self.baseline_latency is None:
+                    self.baseline_latency = latency
+                else:
+                    self.baseline_latency += self.smoothing * (latency - self.baseline_latency)
+            
+            self.condition.notify_all()
+    
+    def decrease(self):
+        """
+        乘性下降（调用方需持有锁）；同一轮内的多个失败只下降一次
+        """
+        now = time.monotonic()
+        cooldown = self.baseline_latency if self.baseline_latency is not None else 0.5
+        if now - self.last_decrease < cooldown:
+            return
+        
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        self.last_decrease = now
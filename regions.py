@@ -0,0 +1,192 @@
+import heapq
+import queue
+import threading
+
+# 服务器（地区）模块：每个服务器的API地址、请求参数和响应格式，以及跨服务器的排行榜合并
+#
+# 国服使用网易排行榜API（config.json中的api_base_url），其他服务器使用暴雪官方排行榜API。
+# 暴雪API的排行榜ID和赛季号与国服不同，这些服务器默认不启用，需要在config.json的"regions"中
+# 配置模式到排行榜ID、国服赛季号到该服务器赛季号的对应关系后启用，例如：
+#   "regions": {"欧服": {"enabled": true, "mode_names": {"undergroundarena": "arena"},
+#                        "season_ids": {"5": 128}}}
+# 也可以覆盖任意服务器的base_url和format（指向本地模拟服务器等）。
+
+# 默认服务器，未知服务器使用该服务器的配置
+DEFAULT_REGION = '国服'
+
+# 合并所有服务器时使用的服务器名称
+ALL_REGIONS = '全部服务器'
+
+BLIZZARD_LEADERBOARD_URL = 'https://hearthstone.blizzard.com/en-us/api/community/leaderboardsData'
+
+# 默认服务器配置（国服的base_url为None时使用api_base_url；其他服务器配置对应关系后才启用）
+DEFAULT_REGIONS = {
+    '国服': {'base_url': None, 'format': 'cn', 'params': {}},
+    '欧服': {'base_url': BLIZZARD_LEADERBOARD_URL, 'format': 'blizzard', 'params': {'region': 'EU'}, 'enabled': False},
+    '美服': {'base_url': BLIZZARD_LEADERBOARD_URL, 'format': 'blizzard', 'params': {'region': 'US'}, 'enabled': False},
+    '亚服': {'base_url': BLIZZARD_LEADERBOARD_URL, 'format': 'blizzard', 'params': {'region': 'AP'}, 'enabled': False},
+}
+
+
+def adapt_cn_response(data):
+    """
+    国服API的响应格式即为内部格式：{'code': 0, 'data': {'list': [{position, battle_tag, score}]}}
+    """
+    return data
+
+
+def adapt_blizzard_response(data):
+    """
+    将暴雪排行榜API的响应（leaderboard.rows中的rank、accountid、rating）转换为内部格式
+    """
+    leaderboard = data.get('leaderboard') or {}
+    rows = leaderboard.get('rows')
+    if rows is None:
+        return {'code': 1, 'message': 'invalid response', 'data': {'list': []}}
+    
+    return {
+        'code': 0,
+        'data': {
+            'list': [
+                {'position': row.get('rank'), 'battle_tag': row.get('accountid'), 'score': row.get('rating') or 0}
+                for row in rows
+            ],
+            'total': (leaderboard.get('pagination') or {}).get('totalSize')
+        }
+    }
+
+
+# 响应适配器（按响应格式）
+RESPONSE_ADAPTERS = {
+    'cn': adapt_cn_response,
+    'blizzard': adapt_blizzard_response,
+}
+
+
+class Region:
+    """
+    单个服务器的请求约定：API地址、请求参数和响应适配器
+    """
+    def __init__(self, name, base_url, response_format='cn', params=None, mode_names=None, season_ids=None,
+                 enabled=True):
+        if response_format not in RESPONSE_ADAPTERS:
+            raise ValueError(f'不支持的响应格式: {response_format}')
+        self.name = name
+        self.base_url = base_url
+        self.response_format = response_format
+        # 附加的固定请求参数
+        self.params = dict(params or {})
+        # 模式键到该服务器排行榜ID的映射（未配置时直接使用模式键）
+        self.mode_names = dict(mode_names or {})
+        # 国服赛季号到该服务器赛季号的映射（未配置时直接使用国服赛季号）
+        self.season_ids = {str(season): season_id for season, season_id in (season_ids or {}).items()}
+        self.enabled = enabled
+        # 响应缓存键的前缀，默认服务器不加前缀以沿用已有缓存
+        self.cache_prefix = '' if name == DEFAULT_REGION else f'{name}:'
+    
+    def build_params(self, mode_name, season_id, page, page_size):
+        """
+        构建分页请求参数
+        """
+        mode_name = self.mode_names.get(mode_name, mode_name)
+        season_id = self.season_ids.get(str(season_id), season_id)
+        if self.response_format == 'blizzard':
+            # 暴雪API每页固定25人，不接受page_size
+            params = {'leaderboardId': mode_name, 'seasonId': season_id, 'page': page}
+        else:
+            params = {'page': page, 'page_size': page_size, 'mode_name': mode_name, 'season_id': season_id}
+        params.update(self.params)
+        return params
+    
+    def adapt(self, data):
+        """
+        将响应转换为内部格式
+        """
+        return RESPONSE_ADAPTERS[self.response_format](data)
+
+
+def get_regions(config_manager, enabled_only=False):
+    """
+    根据配置创建服务器，返回 {服务器名称: Region}；enabled_only为True时只返回已启用的服务器
+    """
+    regions = {}
+    for name, settings in config_manager.get_regions().items():
+        region = Region(
+            name,
+            settings.get('base_url') or config_manager.get_api_base_url(),
+            settings.get('format', 'cn'),
+            settings.get('params'),
+            settings.get('mode_names'),
+            settings.get('season_ids'),
+            settings.get('enabled', True)
+        )
+        if region.enabled or not enabled_only:
+            regions[name] = region
+    return regions
+
+
+def prefetch(iterable, cancel_token, maxsize=100):
+    """
+    在后台线程中提前读取iterable，最多缓冲maxsize项；cancel_token取消后后台线程停止
+    """
+    items = queue.Queue(maxsize)
+    end = object()
+    
+    def put(entry):
+        # 队列已满时等待消费，同时响应取消
+        while not cancel_token.cancelled:
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce():
+        entry = (end, None)
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    break
+        except Exception as e:
+            entry = (end, e)
+        
+        # 已取消时消费方若仍在等待，队列一定为空
+        if not put(entry):
+            try:
+                items.put_nowait(entry)
+            except queue.Full:
+                pass
+    
+    threading.Thread(target=produce, daemon=True).start()
+    
+    while True:
+        item, error = items.get()
+        if error is not None:
+            raise error
+        if item is end:
+            return
+        yield item
+
+
+def merge_by_score(streams, start, end):
+    """
+    k路归并多个按积分从高到低排列的服务器数据流
+    streams为 {服务器: 产出(rank, player, score)的迭代器}，返回全局排名在[start, end]内的
+    (全局排名, 玩家, 积分, 服务器, 服务器排名)列表；只读取到第end名为止
+    """
+    def tag(server, stream):
+        for rank, player, score in stream:
+            yield score, server, rank, player
+    
+    tagged = [tag(server, stream) for server, stream in streams.items()]
+    
+    rows = []
+    for global_rank, (score, server, rank, player) in enumerate(
+            heapq.merge(*tagged, key=lambda row: -row[0]), 1):
+        if global_rank > end:
+            break
+        if global_rank >= start:
+            rows.append((global_rank, player, score, server, rank))
+    
+    return rows
@@ -0,0 +1,169 @@
+import sqlite3
+import threading
+import time
+
+# 排行榜响应缓存模块：按(mode_name, season_id, page, page_size)持久化缓存分页响应
+
+
+class ResponseCache:
+    """
+    基于SQLite的磁盘响应缓存，支持TTL过期、按总大小的LRU淘汰以及ETag/Last-Modified重新验证
+    """
+    def __init__(self, db_path='hs_cache.db', ttl=300, max_bytes=50 * 1024 * 1024):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        
+        # 多个获取线程共用一个连接，由锁保证串行访问
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.init_db()
+    
+    def init_db(self):
+        """
+        初始化缓存表
+        """
+        with self.lock:
+            self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS response_cache (
+                mode_name TEXT,
+                season_id TEXT,
+                page INTEGER,
+                page_size INTEGER,
+                body TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                last_access REAL,
+                size INTEGER,
+                PRIMARY KEY (mode_name, season_id, page, page_size)
+            )
+            ''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_response_cache_access ON response_cache (last_access)')
+            self.conn.commit()
+    
+    def get(self, mode_name, season_id, page, page_size):
+        """
+        获取缓存条目（无论是否过期），不存在时返回None
+        """
+        key = (mode_name, str(season_id), page, page_size)
+        
+        with self.lock:
+            row = self.conn.execute('''
+            SELECT body, etag, last_modified, fetched_at
+            FROM response_cache
+            WHERE mode_name = ? AND season_id = ? AND page = ? AND page_size = ?
+            ''', key).fetchone()
+            
+            if row is None:
+                return None
+            
+            # 更新最近访问时间，用于LRU淘汰
+            self.conn.execute('''
+            UPDATE response_cache SET last_access = ?
+            WHERE mode_name = ? AND season_id = ? AND page = ? AND page_size = ?
+            ''', (time.time(),) + key)
+            self.conn.commit()
+        
+        return {
+            'body': row[0],
+            'etag': row[1],
+            'last_modified': row[2],
+            'fetched_at': row[3]
+        }
+    
+    def is_fresh(self, entry):
+        """
+        判断缓存条目是否仍在TTL有效期内
+        """
+        return time.time() - entry['fetched_at'] < self.ttl
+    
+    def get_validators(self, entry):
+        """
+        根据缓存条目构建条件请求头
+        """
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def put(self, mode_name, season_id, page, page_size, body, etag=None, last_modified=None):
+        """
+        写入缓存条目，并在超出容量时淘汰最久未访问的条目
+        """
+        now = time.time()
+        size = len(body.encode('utf-8'))
+        
+        with self.lock:
+            self.conn.execute('''
+            INSERT OR REPLACE INTO response_cache
+            (mode_name, season_id, page, page_size, body, etag, last_modified, fetched_at, last_access, size)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (mode_name, str(season_id), page, page_size, body, etag, last_modified, now, now, size))
+            self.evict()
+            self.conn.commit()
+    
+    def touch(self, mode_name, season_id, page, page_size):
+        """
+        服务器返回304时刷新缓存条目的获取时间
+        """
+        with self.lock:
+            self.conn.execute('''
+            UPDATE response_cache SET fetched_at = ?, last_access = ?
+            WHERE mode_name = ? AND season_id = ? AND page = ? AND page_size = ?
+            ''', (time.time(), time.time(), mode_name, str(season_id), page, page_size))
+            self.conn.commit()
+    
+    def evict(self):
+        """
+        按LRU顺序淘汰条目，直到缓存总大小不超过上限（调用方需持有锁）
+        """
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM response_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        cursor = self.conn.execute('SELECT rowid, size FROM response_cache ORDER BY last_access')
+        expired = []
+        for rowid, size in cursor:
+            if total <= self.max_bytes:
+                break
+            expired.append((rowid,))
+            total -= size
+        
+        self.conn.executemany('DELETE FROM response_cache WHERE rowid = ?', expired)
+    
+    def clear(self):
+        """
+        清空缓存
+        """
+        with self.lock:
+            self.conn.execute('DELETE FROM response_cache')
+            self.conn.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    获取全局共享的响应缓存，配置中禁用缓存时返回None
+    """
+    global _cache
+    
+    from config import ConfigManager
+    config_manager = ConfigManager()
+    if not config_manager.get_cache_enabled():
+        return None
+    
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    ttl=config_manager.get_cache_ttl(),
+                    max_bytes=config_manager.get_cache_max_bytes()
+                )
+    
+    return _cache
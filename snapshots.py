@@ -0,0 +1,317 @@
+import threading
+import time
+from config import ConfigManager
+from database import DatabaseManager, DEFAULT_MODE, DEFAULT_SERVER, parse_season_number
+from leaderboard import Leaderboard
+from metrics import metrics
+
+# 当前赛季排行榜快照模块：后台定时记录排行榜，按战网ID只保存与上一次快照的差异
+#
+# 每隔keyframe_interval个快照保存一次完整排行榜（关键帧），其余快照只保存排名或积分有变化的玩家，
+# 掉出排行榜的玩家记为rank为NULL的一行。重建任意时刻的排行榜时从之前最近的关键帧开始依次应用差异。
+
+# 压缩后每个时间段只保留一个快照（秒）
+COMPACT_BUCKET_SECONDS = 3600
+
+
+class SnapshotStore:
+    """
+    排行榜快照存储，快照序列按(赛季, 模式, 服务器)区分
+    """
+    def __init__(self, db_manager=None, keyframe_interval=24):
+        self.db_manager = db_manager or DatabaseManager()
+        self.keyframe_interval = max(1, keyframe_interval)
+        # 每个序列最近一次快照的排行榜状态 {(season_num, mode, server): {player: (rank, score)}}
+        self.latest_states = {}
+        self.lock = threading.Lock()
+        self.init_db()
+    
+    def init_db(self):
+        """
+        初始化快照表
+        """
+        conn = self.db_manager.get_connection()
+        
+        with conn:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS rank_snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                season_num INTEGER NOT NULL,
+                mode TEXT NOT NULL,
+                server TEXT NOT NULL,
+                taken_at REAL NOT NULL,
+                is_keyframe INTEGER NOT NULL DEFAULT 0,
+                row_count INTEGER
+            )
+            ''')
+            conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_rank_snapshots_series
+            ON rank_snapshots (season_num, mode, server, taken_at)
+            ''')
+            # 差异行：rank为NULL表示该玩家已不在排行榜上
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS rank_snapshot_deltas (
+                snapshot_id INTEGER NOT NULL,
+                player TEXT NOT NULL,
+                rank INTEGER,
+                score INTEGER,
+                PRIMARY KEY (snapshot_id, player)
+            ) WITHOUT ROWID
+            ''')
+    
+    def take_snapshot(self, data, season, mode=DEFAULT_MODE, server=DEFAULT_SERVER, taken_at=None):
+        """
+        保存一次排行榜快照，data中每行为[rank, player, score]
+        返回写入的差异行数，与上一次快照相同时不写入并返回0
+        """
+        key = (parse_season_number(season), mode, server)
+        taken_at = taken_at if taken_at is not None else time.time()
+        state = {row[1]: (row[0], row[2]) for row in data}
+        
+        with self.lock:
+            previous = self.get_latest_state(key)
+            conn = self.db_manager.get_connection()
+            
+            # 距离上一个关键帧的快照数
+            since_keyframe = conn.execute('''
+            SELECT COUNT(*) FROM rank_snapshots
+            WHERE season_num = ? AND mode = ? AND server = ?
+              AND id > (SELECT COALESCE(MAX(id), 0) FROM rank_snapshots
+                        WHERE season_num = ? AND mode = ? AND server = ? AND is_keyframe = 1)
+            ''', key + key).fetchone()[0]
+            
+            is_keyframe = previous is None or since_keyframe + 1 >= self.keyframe_interval
+            if is_keyframe:
+                deltas = [(player, rank, score) for player, (rank, score) in state.items()]
+            else:
+                deltas = [(player, rank, score) for player, (rank, score) in state.items()
+                          if previous.get(player) != (rank, score)]
+                deltas.extend((player, None, None) for player in previous if player not in state)
+                
+                if not deltas:
+                    return 0
+            
+            with conn:
+                snapshot_id = conn.execute('''
+                INSERT INTO rank_snapshots (season_num, mode, server, taken_at, is_keyframe, row_count)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ''', key + (taken_at, int(is_keyframe), len(state))).lastrowid
+                conn.executemany('''
+                INSERT INTO rank_snapshot_deltas (snapshot_id, player, rank, score)
+                VALUES (?, ?, ?, ?)
+                ''', ((snapshot_id,) + delta for delta in deltas))
+            
+            self.latest_states[key] = state
+        
+        metrics.incr('snapshots.taken')
+        metrics.incr('snapshots.delta_rows', len(deltas))
+        return len(deltas)
+    
+    def get_latest_state(self, key):
+        """
+        获取序列最近一次快照的状态，没有快照时返回None（调用方需持有锁）
+        """
+        if key not in self.latest_states:
+            self.latest_states[key] = self.rebuild_state(key, None)
+        return self.latest_states[key]
+    
+    def rebuild_state(self, key, timestamp):
+        """
+        重建序列在指定时刻（None表示最新）的排行榜状态{player: (rank, score)}，该时刻之前没有快照时返回None
+        """
+        conn = self.db_manager.get_connection()
+        
+        target = conn.execute('''
+        SELECT id FROM rank_snapshots
+        WHERE season_num = ? AND mode = ? AND server = ? AND (? IS NULL OR taken_at <= ?)
+        ORDER BY taken_at DESC, id DESC
+        LIMIT 1
+        ''', key + (timestamp, timestamp)).fetchone()
+        if target is None:
+            return None
+        
+        keyframe = conn.execute('''
+        SELECT MAX(id) FROM rank_snapshots
+        WHERE season_num = ? AND mode = ? AND server = ? AND is_keyframe = 1 AND id <= ?
+        ''', key + target).fetchone()[0] or 0
+        
+        # 从关键帧开始依次应用差异
+        state = {}
+        for player, rank, score in conn.execute('''
+        SELECT d.player, d.rank, d.score
+        FROM rank_snapshots s
+        JOIN rank_snapshot_deltas d ON d.snapshot_id = s.id
+        WHERE s.season_num = ? AND s.mode = ? AND s.server = ? AND s.id BETWEEN ? AND ?
+        ORDER BY s.id
+        ''', key + (keyframe,) + target):
+            if rank is None:
+                state.pop(player, None)
+            else:
+                state[player] = (rank, score)
+        
+        return state
+    
+    def get_leaderboard_at(self, timestamp, season, mode=DEFAULT_MODE, server=DEFAULT_SERVER):
+        """
+        重建指定时刻的排行榜，返回按排名排序的Leaderboard
+        """
+        state = self.rebuild_state((parse_season_number(season), mode, server), timestamp)
+        
+        leaderboard = Leaderboard()
+        for player, (rank, score) in (state or {}).items():
+            leaderboard.append(rank, player, score)
+        leaderboard.sort(by='rank')
+        return leaderboard
+    
+    def get_player_trajectory(self, player, season, mode=DEFAULT_MODE, server=DEFAULT_SERVER):
+        """
+        获取玩家的排名走势，返回[(taken_at, rank, score)]列表，只包含变化点，rank为None表示不在排行榜上
+        """
+        conn = self.db_manager.get_connection()
+        
+        # 玩家的差异行，以及不包含该玩家的关键帧（说明此时不在排行榜上）
+        trajectory = []
+        for taken_at, rank, score in conn.execute('''
+        SELECT s.taken_at, d.rank, d.score
+        FROM rank_snapshots s
+        LEFT JOIN rank_snapshot_deltas d ON d.snapshot_id = s.id AND d.player = ?
+        WHERE s.season_num = ? AND s.mode = ? AND s.server = ?
+          AND (d.player IS NOT NULL OR s.is_keyframe = 1)
+        ORDER BY s.id
+        ''', (player, parse_season_number(season), mode, server)):
+            if trajectory and trajectory[-1][1:] == (rank, score):
+                continue
+            if not trajectory and rank is None:
+                continue
+            trajectory.append((taken_at, rank, score))
+        
+        return trajectory
+    
+    def compact(self, retention_days, compact_after_days, now=None):
+        """
+        清理和压缩快照：删除保留期之前的快照，较早的快照每个时间段只保留一个
+        被压缩掉的快照的差异合并到下一个快照中，保留下来的时刻仍可准确重建
+        返回删除的快照数
+        """
+        now = now if now is not None else time.time()
+        retention_cutoff = now - retention_days * 86400
+        compact_cutoff = now - compact_after_days * 86400
+        conn = self.db_manager.get_connection()
+        removed = 0
+        
+        with self.lock, conn:
+            series = conn.execute('SELECT DISTINCT season_num, mode, server FROM rank_snapshots').fetchall()
+            for key in series:
+                # 保留期之前最后一个关键帧之前的快照不再需要
+                keyframe = conn.execute('''
+                SELECT MAX(id) FROM rank_snapshots
+                WHERE season_num = ? AND mode = ? AND server = ? AND is_keyframe = 1 AND taken_at <= ?
+                ''', key + (retention_cutoff,)).fetchone()[0]
+                if keyframe is not None:
+                    expired = [row[0] for row in conn.execute('''
+                    SELECT id FROM rank_snapshots
+                    WHERE season_num = ? AND mode = ? AND server = ? AND id < ?
+                    ''', key + (keyframe,))]
+                    self.delete_snapshots(conn, expired)
+                    removed += len(expired)
+                
+                # 压缩：每个时间段保留第一个快照和所有关键帧，其余快照合并到下一个快照
+                snapshots = conn.execute('''
+                SELECT id, taken_at, is_keyframe FROM rank_snapshots
+                WHERE season_num = ? AND mode = ? AND server = ?
+                ORDER BY id
+                ''', key).fetchall()
+                kept_buckets = set()
+                for index, (snapshot_id, taken_at, is_keyframe) in enumerate(snapshots[:-1]):
+                    bucket = int(taken_at // COMPACT_BUCKET_SECONDS)
+                    if taken_at >= compact_cutoff or is_keyframe or bucket not in kept_buckets:
+                        kept_buckets.add(bucket)
+                        continue
+                    
+                    next_id, _, next_is_keyframe = snapshots[index + 1]
+                    if not next_is_keyframe:
+                        # 下一个快照中已有的玩家以下一个快照为准
+                        conn.execute('''
+                        INSERT OR IGNORE INTO rank_snapshot_deltas (snapshot_id, player, rank, score)
+                        SELECT ?, player, rank, score FROM rank_snapshot_deltas WHERE snapshot_id = ?
+                        ''', (next_id, snapshot_id))
+                    self.delete_snapshots(conn, [snapshot_id])
+                    removed += 1
+        
+        if removed:
+            metrics.incr('snapshots.compacted', removed)
+        return removed
+    
+    def delete_snapshots(self, conn, snapshot_ids):
+        """
+        删除快照及其差异行（由调用方管理事务）
+        """
+        conn.executemany('DELETE FROM rank_snapshot_deltas WHERE snapshot_id = ?',
+                         ((snapshot_id,) for snapshot_id in snapshot_ids))
+        conn.executemany('DELETE FROM rank_snapshots WHERE id = ?',
+                         ((snapshot_id,) for snapshot_id in snapshot_ids))
+
+
+class SnapshotScheduler:
+    """
+    后台快照调度器，按配置的间隔获取当前赛季排行榜并保存快照
+    """
+    def __init__(self, store=None, interval=None, rank_range=None):
+        self.config_manager = ConfigManager()
+        self.store = store or SnapshotStore(keyframe_interval=self.config_manager.get_snapshot_keyframe_interval())
+        self.interval = interval or self.config_manager.get_snapshot_interval()
+        self.rank_range = rank_range or self.config_manager.get_snapshot_rank_range()
+        self.api_handler = None
+        self.stop_event = threading.Event()
+        self.thread = None
+    
+    def start(self):
+        """
+        启动后台线程，立即获取第一个快照
+        """
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name='SnapshotScheduler', daemon=True)
+        self.thread.start()
+    
+    def stop(self, timeout=5):
+        """
+        停止后台线程
+        """
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+    
+    def run(self):
+        while not self.stop_event.is_set():
+            self.snapshot_once()
+            self.stop_event.wait(self.interval)
+    
+    def snapshot_once(self):
+        """
+        获取当前赛季排行榜并保存快照，然后按保留策略压缩，返回写入的差异行数，失败时返回None
+        """
+        try:
+            # 在后台线程中创建，避免在界面线程中创建网络客户端；复用快照存储的数据库，不再重复初始化
+            if self.api_handler is None:
+                from api_handler import APIHandler
+                self.api_handler = APIHandler(self.store.db_manager)
+            
+            season = self.config_manager.get_current_season()
+            with metrics.timer('snapshot.fetch'):
+                data = self.api_handler.get_rank_data(DEFAULT_MODE, DEFAULT_SERVER, '全部', self.rank_range, season)
+            
+            # 获取失败时返回空数据，不能记为所有玩家掉出排行榜
+            if not data:
+                print('获取排行榜快照失败：未获取到数据')
+                return None
+            
+            with metrics.timer('snapshot.save'):
+                changes = self.store.take_snapshot(data, season, DEFAULT_MODE, DEFAULT_SERVER)
+                self.store.compact(self.config_manager.get_snapshot_retention_days(),
+                                   self.config_manager.get_snapshot_compact_after_days())
+            return changes
+        except Exception as e:
+            print(f"保存排行榜快照失败: {e}")
+            return None
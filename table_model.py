@@ -0,0 +1,131 @@
+import bisect
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QColor
+from leaderboard import Leaderboard
+
+# 表格模型模块：结果表格只保存原始数据，单元格内容在显示时按需生成
+
+# 一页数据拆分出的插入区间超过该数量时，整体合并后重置模型
+MAX_INSERT_RUNS = 32
+
+
+class RankTableModel(QAbstractTableModel):
+    """
+    只读表格模型，数据保存为Leaderboard或元组列表，data()只为可见单元格生成显示内容
+    """
+    def __init__(self, headers, parent=None):
+        super().__init__(parent)
+        self.headers = list(headers)
+        self.rows = []
+        # 高亮显示包含该文本的行（按highlight_column列匹配）
+        self.highlight_text = ''
+        self.highlight_column = 1
+        self.highlight_color = QColor(Qt.yellow)
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        row = self.rows[index.row()]
+        
+        if role == Qt.DisplayRole:
+            column = index.column()
+            return str(row[column]) if column < len(row) else ''
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role == Qt.BackgroundRole and self.highlight_text:
+            if self.highlight_text in str(row[self.highlight_column]).lower():
+                return self.highlight_color
+        
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and section < len(self.headers):
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+    
+    def flags(self, index):
+        # 只读
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+    
+    def set_headers(self, headers):
+        """
+        设置表头并清空数据
+        """
+        self.beginResetModel()
+        self.headers = list(headers)
+        self.rows = []
+        self.endResetModel()
+    
+    def set_rows(self, rows):
+        """
+        替换全部数据，排行榜数据直接引用，其他数据转换为元组列表
+        """
+        self.beginResetModel()
+        self.rows = rows if isinstance(rows, Leaderboard) else [tuple(row) for row in rows]
+        self.endResetModel()
+    
+    def clear(self):
+        """
+        清空数据
+        """
+        self.set_rows([])
+    
+    def insert_sorted_rows(self, rows):
+        """
+        按排名顺序插入新的排行榜数据
+        新数据先按排名排序，插入到同一位置的连续行作为一个区间一次插入
+        """
+        # 复制一份再排序，不修改调用方（可能被多个订阅者共享）的数据
+        page = rows[:] if isinstance(rows, Leaderboard) else Leaderboard(rows)
+        if not page:
+            return
+        page.sort(by='rank')
+        
+        # 表格为空时直接替换全部数据
+        if not self.rows:
+            self.set_rows(page)
+            return
+        
+        if not isinstance(self.rows, Leaderboard):
+            self.rows = Leaderboard.from_rows(self.rows)
+        
+        # 按插入位置（相对于插入前的数据）把新数据分成连续区间
+        runs = []
+        for index, rank in enumerate(page.ranks):
+            position = bisect.bisect_right(self.rows.ranks, rank)
+            if runs and runs[-1][0] == position:
+                runs[-1][2] = index + 1
+            else:
+                runs.append([position, index, index + 1])
+        
+        # 区间过多时整体合并（排序稳定，相同排名的已有行仍在前面）
+        if len(runs) > MAX_INSERT_RUNS:
+            self.beginResetModel()
+            self.rows.extend(page)
+            self.rows.sort(by='rank')
+            self.endResetModel()
+            return
+        
+        inserted = 0
+        for position, first, last in runs:
+            position += inserted
+            self.beginInsertRows(QModelIndex(), position, position + last - first - 1)
+            self.rows.insert_rows(position, page[first:last])
+            self.endInsertRows()
+            inserted += last - first
+    
+    def set_highlight(self, text):
+        """
+        设置高亮文本（不区分大小写），为空时取消高亮
+        """
+        self.highlight_text = text.lower()
+        if self.rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.rows) - 1, len(self.headers) - 1),
+                                  [Qt.BackgroundRole])